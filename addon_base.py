@@ -1,10 +1,17 @@
-import pyglet
+import contextlib
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple, TYPE_CHECKING
+
+# pyglet нужен только для аннотаций: его импортирует код отрисовки
+if TYPE_CHECKING:
+    import pyglet
 
 class BaseAddon(ABC):
     """Абстрактный базовый класс для всех аддонов"""
     
+    # Профилировщик кадра, задаётся AddonManager при регистрации
+    profiler = None
+    
     @property
     @abstractmethod
     def addon_id(self) -> str:
@@ -23,6 +30,54 @@ class BaseAddon(ABC):
         pass
     
     @abstractmethod
-    def create_batch(self, data: Any, batch: Optional[pyglet.graphics.Batch] = None) -> pyglet.graphics.Batch:
+    def create_batch(self, data: Any, batch: Optional['pyglet.graphics.Batch'] = None) -> 'pyglet.graphics.Batch':
         """Создание графических объектов"""
-        pass
\ No newline at end of file
+        pass
+    
+    def prepare(self, data: Any) -> Any:
+        """
+        Подготовка данных без обращения к GL
+        
+        Вызывается из фонового потока (ConfigWatcher) и не должна менять
+        состояние аддона. Результат передаётся в reload(prepared=...).
+        """
+        return None
+    
+    def reload(self, data: Any, batch: Optional['pyglet.graphics.Batch'],
+               prepared: Any = None) -> 'pyglet.graphics.Batch':
+        """
+        Применение изменённых данных к уже созданному batch
+        
+        По умолчанию - полное пересоздание; аддон может переопределить
+        метод и перестроить только изменившиеся объекты.
+        
+        Args:
+            batch: текущий batch аддона; None - создать новый
+            prepared: результат prepare(data), если он был вызван
+        """
+        return self.create_batch(data)
+    
+    def view_offset(self) -> Tuple[float, float]:
+        """Смещение геометрии аддона при отрисовке (матрица вида)"""
+        return 0.0, 0.0
+    
+    def close(self):
+        """Освобождение ресурсов аддона при закрытии приложения"""
+        pass
+    
+    def update(self, dt: float, lag: float = 0.0):
+        """
+        Шаг симуляции: продвинуть время аддона на dt секунд
+        
+        Args:
+            lag: время сверх целых шагов (меньше шага) - кадр
+                 рисуется на время симуляции + lag
+        """
+        pass
+    
+    def profile(self, stage: str):
+        """Замер стадии аддона: with self.profile('evaluate'): ..."""
+        if self.profiler is None:
+            return contextlib.nullcontext()
+        return self.profiler.stage(f"{self.addon_id}.{stage}")
+
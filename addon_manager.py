@@ -1,23 +1,54 @@
-from typing import Dict, List, Any
-import pyglet
+import copy
+from typing import Dict, List, Any, Tuple, TYPE_CHECKING
+
+# pyglet нужен только для аннотаций: менеджер импортируется без GL
+if TYPE_CHECKING:
+    import pyglet
 
 class AddonManager:
     """Централизованный менеджер аддонов"""
     
     def __init__(self):
         self.addons: Dict[str, BaseAddon] = {}
-        self.batches: Dict[str, pyglet.graphics.Batch] = {}
+        self.batches: Dict[str, 'pyglet.graphics.Batch'] = {}
+        self.profiler = None  # FrameProfiler, передаётся аддонам
+        
+        # Данные, из которых построен batch аддона: addon_id -> (тип, копия JSON)
+        self.loaded: Dict[str, Any] = {}
     
     def register_addon(self, addon):
         """Регистрация аддона"""
         from addon_base import BaseAddon
         if isinstance(addon, BaseAddon):
             self.addons[addon.addon_id] = addon
+            addon.profiler = self.profiler
             print(f"Addon '{addon.addon_id}' registered (types: {addon.supported_types})")
     
-    def process_json(self, json_data: Dict[str, Any]) -> Dict[str, pyglet.graphics.Batch]:
-        """Обработка JSON данных через аддоны"""
-        batches = {}
+    def process_json(self, json_data: Dict[str, Any], force: bool = False) -> Dict[str, 'pyglet.graphics.Batch']:
+        """
+        Обработка JSON данных через аддоны
+        
+        Данные аддона сравниваются с загруженными ранее: неизменённые
+        batch сохраняются, изменённые обновляются через addon.reload.
+        
+        Args:
+            force: пересоздать все batch без сравнения
+        """
+        return self.apply_prepared(self.prepare_json(json_data, force=force), force=force)
+    
+    def prepare_json(self, json_data: Dict[str, Any], force: bool = False,
+                     prepare_addons: bool = False) -> List[Tuple[str, Any, Any, Any]]:
+        """
+        Поиск, валидация и копирование данных аддонов (без GL)
+        
+        Args:
+            prepare_addons: вызвать addon.prepare для изменённых данных;
+                            так делает фоновый поток ConfigWatcher
+        
+        Returns:
+            Список (addon_id, data, snapshot, prepared) для apply_prepared
+        """
+        entries = []
         
         print(f"\nProcessing JSON data. Keys: {list(json_data.keys())}")
         
@@ -34,15 +65,76 @@ class AddonManager:
                     
                     if addon.validate(data):
                         print(f"  ✓ Data validated successfully")
-                        batch = addon.create_batch(data)
-                        if batch is not None:
-                            batches[addon_id] = batch
-                            print(f"  ✓ Created batch for {addon_id}")
+                        
+                        # Копия до create_batch: аддон может дополнить данные
+                        snapshot = (obj_type, copy.deepcopy(data))
+                        
+                        prepared = None
+                        if prepare_addons and (force or self.loaded.get(addon_id) != snapshot):
+                            prepared = addon.prepare(data)
+                        
+                        entries.append((addon_id, data, snapshot, prepared))
                     else:
                         print(f"  ✗ Data validation failed")
                 else:
                     print(f"  ✗ Type '{obj_type}' not found in JSON")
         
+        return entries
+    
+    def apply_prepared(self, entries: List[Tuple[str, Any, Any, Any]],
+                       force: bool = False) -> Dict[str, 'pyglet.graphics.Batch']:
+        """
+        Создание и обновление batch по результату prepare_json
+        
+        Выполняется в основном потоке (GL); набор batch
+        заменяется целиком в конце.
+        """
+        batches = {}
+        loaded = {}
+        
+        for addon_id, data, snapshot, prepared in entries:
+            addon = self.addons[addon_id]
+            previous_batch = self.batches.get(addon_id)
+            
+            if not force and previous_batch is not None and self.loaded.get(addon_id) == snapshot:
+                batch = previous_batch
+                action = "Kept unchanged"
+            elif force or previous_batch is None:
+                batch = addon.reload(data, None, prepared) if prepared is not None else addon.create_batch(data)
+                action = "Created"
+            else:
+                batch = addon.reload(data, previous_batch, prepared)
+                action = "Reloaded"
+            
+            if batch is not None:
+                batches[addon_id] = batch
+                loaded[addon_id] = snapshot
+                print(f"  ✓ {action} batch for {addon_id}")
+        
         print(f"\nTotal batches created: {len(batches)}")
         self.batches = batches
-        return batches
\ No newline at end of file
+        self.loaded = loaded
+        return batches
+    
+    def set_profiler(self, profiler):
+        """Профилировщик для менеджера и всех аддонов"""
+        self.profiler = profiler
+        for addon in self.addons.values():
+            addon.profiler = profiler
+    
+    def close(self):
+        """Закрытие всех аддонов"""
+        for addon in self.addons.values():
+            addon.close()
+    
+    def update(self, dt: float, lag: float = 0.0):
+        """Шаг симуляции для аддонов, у которых есть batch (lag - см. BaseAddon.update)"""
+        for addon_id in self.batches:
+            addon = self.addons.get(addon_id)
+            if addon is None:
+                continue
+            if self.profiler is None:
+                addon.update(dt, lag)
+            else:
+                with self.profiler.stage(f"{addon_id}.update"):
+                    addon.update(dt, lag)
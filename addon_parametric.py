@@ -1,23 +1,43 @@
 """
 Аддон параметрических линий
 """
-import pyglet
 import time as time_module
-from typing import Dict, Any, Optional, List, Callable
+import pyglet
+import numpy as np
+from typing import Dict, Any, Optional, List, Callable, Tuple
 from addon_base import BaseAddon
+from math_engine.diagnostics import diagnostics
+from line_renderer import LineBuffer
 from math_engine.expression_parser import ExpressionParser
+from parametric_layer import ParametricLayer
 from patterns.connect_pattern import ConnectPattern
+from patterns.scene_cache import SceneCache
 
 
 class ParametricLinesAddon(BaseAddon):
-    """Аддон для рисования параметрических линий"""
+    """
+    Аддон для рисования параметрических линий
+    
+    "parametric_lines" - один паттерн или список слоёв-паттернов.
+    Линии всех слоёв лежат подряд в одном вершинном буфере
+    и рисуются одним вызовом.
+    """
     
     def __init__(self, window_center_callback: Callable[[], List[int]] = None):
         self.lines = []
         self.batch = None
+        self.layers: List[ParametricLayer] = []
+        self.line_buffer = None  # Режим renderer = "buffer"
+        self._line_counts: List[int] = []  # Линий в слоях при создании буфера
+        self._uploaded_colors: List[Optional[np.ndarray]] = []  # Последние записанные цвета слоёв
+        self._draw_ms = 0.0
+        self.pattern_names: Optional[List[str]] = None
+        self.renderer = None
         self.expression_parser = ExpressionParser()
-        self.start_time = time_module.time()
+        self.sim_time = 0.0  # Время симуляции, продвигается в update(dt)
+        self.lag = 0.0  # Остаток меньше шага симуляции, см. frame_time
         self.window_center_callback = window_center_callback  # Коллбэк для получения центра
+        self.auto_center = False  # Все слои переносит в центр окна матрица вида
         
         # Регистрация паттернов
         self._register_patterns()
@@ -36,103 +56,425 @@ class ParametricLinesAddon(BaseAddon):
     def supported_types(self) -> list:
         return ["parametric_lines"]
     
+    @property
+    def pattern(self):
+        """Паттерн первого слоя (сцена из одного паттерна)"""
+        return self.layers[0].pattern if self.layers else None
+    
     def validate(self, data: Any) -> bool:
-        """Валидация данных"""
+        """Валидация данных: паттерн или список слоёв"""
+        if isinstance(data, list):
+            return all(isinstance(item, dict) for item in data)
         return isinstance(data, dict)
     
-    def create_batch(self, data: Dict[str, Any], batch: Optional[pyglet.graphics.Batch] = None) -> pyglet.graphics.Batch:
-        """Создание линий по паттерну"""
+    @staticmethod
+    def _layer_configs(data: Any) -> List[Dict[str, Any]]:
+        """Конфигурации слоёв: список или один паттерн"""
+        return data if isinstance(data, list) else [data]
+    
+    def _known_layer_configs(self, data: Any) -> List[Dict[str, Any]]:
+        """Слои с зарегистрированным типом паттерна"""
+        return [config for config in self._layer_configs(data)
+                if config.get('pattern', 'connect') in self.pattern_classes]
+    
+    def _pattern_names(self, data: Any) -> List[str]:
+        return [config.get('pattern', 'connect') for config in self._layer_configs(data)]
+    
+    def _renderer(self, data: Any) -> str:
+        """Способ отрисовки задаётся первым слоем"""
+        configs = self._layer_configs(data)
+        return configs[0].get('renderer', 'buffer') if configs else 'buffer'
+    
+    def create_batch(self, data: Any, batch: Optional[pyglet.graphics.Batch] = None,
+                     prepared: Optional[List[Tuple[ConnectPattern, bool]]] = None) -> pyglet.graphics.Batch:
+        """Создание линий по паттернам слоёв"""
         if batch is None:
             batch = pyglet.graphics.Batch()
         
+        self.close()
         self.batch = batch
         self.lines = []
-        self.start_time = time_module.time()
+        self.line_buffer = None
+        self.sim_time = 0.0
+        self.lag = 0.0
+        
+        # Создаем и настраиваем паттерны (если они не собраны в prepare)
+        if prepared is None:
+            prepared = self._build_layers(data, self.expression_parser)
+        self._adopt_layers(prepared)
+        for layer in self.layers:
+            layer.setup()
+        self._draw_ms = 0.0
+        
+        self.pattern_names = self._pattern_names(data)
+        self.renderer = self._renderer(data)
+        
+        # Создаем линии: один вершинный буфер или отдельные фигуры
+        self._create_lines()
+        
+        return batch
+    
+    def prepare(self, data: Any) -> List[Tuple[ConnectPattern, bool]]:
+        """
+        Сборка паттернов слоёв и компиляция точек без GL (фоновый поток)
+        
+        У паттернов свой ExpressionParser: пространство имён парсера
+        общее для вызовов eval и не разделяется между потоками.
+        """
+        prepared = self._build_layers(data, ExpressionParser())
+        
+        # Точки, уже скомпилированные текущими слоями, не компилируются заново
+        current = [layer.pattern for layer in self.layers]
+        for pattern, _ in prepared:
+            for old in current:
+                if isinstance(pattern, ConnectPattern) and isinstance(old, ConnectPattern):
+                    pattern.reuse_programs(old)
+        
+        # Компиляция точек и кэши параметров, зависящих только от n
+        for pattern, _ in prepared:
+            pattern.calculate_all_lines(self.frame_time)
+        return prepared
+    
+    def reload(self, data: Any, batch: Optional[pyglet.graphics.Batch],
+               prepared: Optional[List[Tuple[ConnectPattern, bool]]] = None) -> pyglet.graphics.Batch:
+        """
+        Применение изменённой конфигурации без пересоздания batch
+        
+        Паттерны перекомпилируют только изменённые точки; вершинный
+        буфер (или фигуры) пересоздаётся, только если изменилось
+        число линий какого-либо слоя. Время симуляции сохраняется.
+        """
+        if (batch is None or batch is not self.batch or not self.layers
+                or self._pattern_names(data) != self.pattern_names
+                or self._renderer(data) != self.renderer):
+            return self.create_batch(data, prepared=prepared)
+        
+        # Процессы, запечённые кадры и LOD перезапускаются только
+        # у слоёв с изменённой конфигурацией
+        if prepared is None:
+            changed = []
+            for layer, config in zip(self.layers, self._known_layer_configs(data)):
+                config, layer.auto_center = self._resolve_center(config)
+                if config != layer.config:
+                    layer.pattern.set_config(config)
+                    changed.append(layer)
+            self._update_auto_center()
+        else:
+            changed = self._replace_layers(prepared)
+        for layer in changed:
+            layer.setup()
+        self._draw_ms = 0.0
+        
+        if [layer.line_count for layer in self.layers] != self._line_counts:
+            self._delete_lines()
+            self._create_lines()
+            line_count = sum(self._line_counts)
+            if self.renderer == 'shapes':
+                print(f"ParametricLines: Recreated {line_count} lines")
+            else:
+                print(f"ParametricLines: Reallocated buffer for {line_count} lines")
+            return batch
+        
+        self.update_lines()
+        return batch
+    
+    def _build_layers(self, data: Any, parser: ExpressionParser) -> List[Tuple[ConnectPattern, bool]]:
+        """
+        Паттерны слоёв по конфигурации: (паттерн, центр задаётся окном)
+        
+        Все слои вычисляет один парсер выражений.
+        """
+        prepared = []
+        for index, config in enumerate(self._layer_configs(data)):
+            pattern_name = config.get('pattern', 'connect')
+            pattern_class = self.pattern_classes.get(pattern_name)
+            if pattern_class is None:
+                print(f"ParametricLines: unknown pattern '{pattern_name}' in layer {index}")
+                continue
+            
+            config, auto_center = self._resolve_center(config)
+            
+            pattern = pattern_class()
+            pattern.set_config(config)
+            pattern.set_expression_parser(parser)
+            
+            # Скомпилированная сцена сохраняется на диск (размер кэша ограничен;
+            # "scene_cache": false - отключить)
+            if config.get('scene_cache', True):
+                pattern.scene_cache = SceneCache()
+            
+            prepared.append((pattern, auto_center))
+        
+        return prepared
+    
+    def _adopt_layers(self, prepared: List[Tuple[ConnectPattern, bool]]):
+        """Установка собранных паттернов вместе с их парсером"""
+        self.layers = [ParametricLayer(pattern, auto_center) for pattern, auto_center in prepared]
+        if self.layers:
+            self.expression_parser = self.layers[0].pattern.expression_parser
+        self._update_auto_center()
+    
+    def _replace_layers(self, prepared: List[Tuple[ConnectPattern, bool]]) -> List[ParametricLayer]:
+        """
+        Установка паттернов из prepare поверх текущих слоёв
+        
+        Слой с прежней конфигурацией остаётся вместе с вычислителем,
+        остальные заменяются новыми. Returns: новые слои.
+        """
+        layers = []
+        changed = []
+        for index, (pattern, auto_center) in enumerate(prepared):
+            old = self.layers[index] if index < len(self.layers) else None
+            if old is not None and old.config == pattern.config:
+                old.auto_center = auto_center
+                layers.append(old)
+                continue
+            
+            if old is not None:
+                old.close()
+            layer = ParametricLayer(pattern, auto_center)
+            layers.append(layer)
+            changed.append(layer)
+        
+        for old in self.layers[len(prepared):]:
+            old.close()
+        self.layers = layers
+        self._update_auto_center()
+        return changed
+    
+    def _update_auto_center(self):
+        """Матрица вида переносит аддон, только если все слои без центра"""
+        self.auto_center = bool(self.layers) and all(layer.auto_center for layer in self.layers)
+    
+    def close(self):
+        """Остановка процессов вычисления"""
+        for layer in self.layers:
+            layer.close()
+    
+    def _resolve_center(self, data: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Центр паттерна, если он не задан явно
+        
+        Паттерн вычисляется относительно (0, 0), а к центру окна его
+        переносит матрица вида (view_offset): изменение размера окна
+        не требует пересчёта геометрии.
         
-        # Автоматически получаем центр окна, если не задан явно
-        if 'center' not in data and self.window_center_callback:
+        Returns:
+            (конфигурация паттерна, центр задаётся окном)
+        """
+        if 'center' in data or self.window_center_callback is None:
+            return data, False
+        
+        config = dict(data)
+        config['center'] = [0, 0]
+        return config, True
+    
+    def view_offset(self) -> Tuple[float, float]:
+        """Перенос автоматически центрированного паттерна в центр окна"""
+        if self.auto_center:
             center = self.window_center_callback()
             if center:
-                data['center'] = center
-                print(f"ParametricLines: Using window center {center}")
+                return center[0], center[1]
+        return 0.0, 0.0
+    
+    def _layer_shift(self, layer: ParametricLayer) -> Optional[Tuple[float, float, float, float]]:
+        """
+        Смещение линий слоя без центра, если другие слои задают центр
         
-        pattern_name = data.get('pattern', 'connect')
+        Матрица вида общая для буфера, поэтому такой слой переносится
+        в центр окна при записи координат.
+        """
+        if not layer.auto_center or self.auto_center:
+            return None
+        center = self.window_center_callback()
+        if not center:
+            return None
+        return (center[0], center[1], center[0], center[1])
+    
+    def _create_lines(self):
+        """Диапазоны слоёв и линии: один вершинный буфер или отдельные фигуры"""
+        offset = 0
+        for layer in self.layers:
+            layer.offset = offset
+            offset += layer.line_count
+        self._line_counts = [layer.line_count for layer in self.layers]
+        self._uploaded_colors = [None] * len(self.layers)
         
-        # Создаем паттерн
-        pattern = ConnectPattern()
+        if self.renderer == 'shapes':
+            self._create_pattern_lines()
+        else:
+            self._create_pattern_buffer()
+    
+    def _delete_lines(self):
+        """Удаление фигур или вершинного буфера"""
+        for line_info in self.lines:
+            line_info['shape'].delete()
+        self.lines = []
         
-        # Настраиваем паттерн
-        pattern.set_config(data)
-        pattern.set_expression_parser(self.expression_parser)
+        if self.line_buffer is not None:
+            self.line_buffer.delete()
+            self.line_buffer = None
+    
+    def _create_pattern_buffer(self):
+        """Создание вершинного буфера для линий всех слоёв"""
+        line_count = sum(self._line_counts)
         
-        # Создаем линии
-        self._create_pattern_lines(pattern, data)
+        if line_count == 0:
+            return
         
-        return batch
+        self.line_buffer = LineBuffer(line_count, self.batch)
+        self._upload_lines(self._calculate_layers(), self._calculate_colors())
     
-    def _create_pattern_lines(self, pattern, config: Dict[str, Any]):
-        """Создание графических линий для паттерна"""
-        line_count = pattern.get_line_count()
+    def _create_pattern_lines(self):
+        """Создание графических линий для паттернов слоёв"""
+        line_count = sum(self._line_counts)
         
         if line_count == 0:
             return
         
-        current_time = time_module.time() - self.start_time
+        # Все координаты кадра одним массивом
+        coords = self._merge_layers(self._calculate_layers(), line_count)
         
         for n in range(line_count):
             try:
-                # Получаем координаты линии
-                (start_x, start_y), (end_x, end_y) = pattern.calculate_line(n, current_time)
-                
-                # Белый цвет
-                color = (255, 255, 255)
+                start_x, start_y, end_x, end_y = coords[n].tolist()
                 
-                # Создаем линию
+                # Создаем линию (цвет записывается вместе с координатами)
                 line = pyglet.shapes.Line(
                     start_x, start_y,
                     end_x, end_y,
-                    color=color,
                     batch=self.batch
                 )
                 
                 self.lines.append({
                     'shape': line,
-                    'pattern': pattern,
-                    'index': n,
-                    'config': config.copy()
+                    'index': n
                 })
-                
+            
             except Exception as e:
-                print(f"Error creating line {n}: {e}")
-                pass
+                diagnostics.error("ParametricLines.create_line", type(e).__name__, f"Error creating line {n}: {e}")
+        
+        self._upload_colors(self._calculate_colors())
     
     def update_lines(self):
         """Обновление линий на основе текущего времени"""
-        if not self.batch or not self.lines:
+        if not self.batch or not self.layers:
             return
         
-        current_time = time_module.time() - self.start_time
+        frames = []
+        colors = []
+        evaluate_ms = []
+        try:
+            with self.profile('evaluate'):
+                for layer in self.layers:
+                    started = time_module.perf_counter()
+                    frames.append(layer.calculate(self.frame_time))
+                    colors.append(layer.calculate_colors(self.frame_time))
+                    evaluate_ms.append((time_module.perf_counter() - started) * 1000.0)
+        except Exception as e:
+            diagnostics.error("ParametricLines.update", type(e).__name__, f"Error updating lines: {e}")
+            return
+        
+        started = time_module.perf_counter()
+        with self.profile('upload'):
+            self._upload_lines(frames, colors)
+        upload_ms = (time_module.perf_counter() - started) * 1000.0
         
+        # Запись и отрисовка общие: слою достаётся доля по числу линий
+        total = max(1, sum(self._line_counts))
+        for layer, layer_ms in zip(self.layers, evaluate_ms):
+            share = layer.line_count / total
+            layer.record_frame(layer_ms + (upload_ms + self._draw_ms) * share)
+    
+    def _calculate_layers(self) -> List[np.ndarray]:
+        """Линии кадра каждого слоя"""
+        return [layer.calculate(self.frame_time) for layer in self.layers]
+    
+    def _calculate_colors(self) -> List[np.ndarray]:
+        """Цвета линий кадра каждого слоя"""
+        return [layer.calculate_colors(self.frame_time) for layer in self.layers]
+    
+    def _merge_layers(self, frames: List[np.ndarray], line_count: int) -> np.ndarray:
+        """Линии слоёв одним массивом по их диапазонам"""
+        coords = np.zeros((line_count, 4), dtype=np.float32)
+        for layer, frame in zip(self.layers, frames):
+            target = coords[layer.offset:layer.offset + len(frame)]
+            target[:] = frame
+            shift = self._layer_shift(layer)
+            if shift is not None:
+                target += shift
+        return coords
+    
+    def _upload_lines(self, frames: List[np.ndarray], colors: List[np.ndarray]):
+        """Запись координат и цветов кадра в буфер или в фигуры"""
+        self._upload_colors(colors)
+        
+        # Один вершинный буфер: каждый слой пишет свой диапазон
+        if self.line_buffer is not None:
+            for layer, coords in zip(self.layers, frames):
+                shift = self._layer_shift(layer)
+                if shift is not None:
+                    coords = coords + np.asarray(shift, dtype=np.float32)
+                self.line_buffer.update(coords, layer.offset, layer.line_count)
+            return
+        
+        # Линии вне подмножества LOD вырождаются в точку
+        coords = self._merge_layers(frames, len(self.lines)).tolist()
         for line_info in self.lines:
             try:
-                pattern = line_info['pattern']
-                n = line_info['index']
                 line = line_info['shape']
                 
-                # Вычисляем новые координаты
-                (start_x, start_y), (end_x, end_y) = pattern.calculate_line(n, current_time)
-                
                 # Обновляем линию
-                line.x = start_x
-                line.y = start_y
-                line.x2 = end_x
-                line.y2 = end_y
-                
+                line.x, line.y, line.x2, line.y2 = coords[line_info['index']]
+            
             except Exception as e:
-                print(f"Error updating line: {e}")
-                pass
+                diagnostics.error("ParametricLines.update_line", type(e).__name__, f"Error updating line: {e}")
     
-    def draw(self, batch: pyglet.graphics.Batch):
-        """Отрисовка с обновлением анимации"""
+    def _upload_colors(self, colors: List[np.ndarray]):
+        """
+        Запись цветов слоёв, изменившихся с прошлого кадра
+        
+        Паттерн возвращает тот же массив, пока цвета не зависят
+        от времени: статичные цвета записываются один раз.
+        """
+        for index, (layer, layer_colors) in enumerate(zip(self.layers, colors)):
+            if layer_colors is self._uploaded_colors[index]:
+                continue
+            self._uploaded_colors[index] = layer_colors
+            
+            if self.line_buffer is not None:
+                self.line_buffer.update_colors(layer_colors, layer.offset, layer.line_count)
+                continue
+            
+            layer_colors = layer_colors.tolist()
+            written = min(len(layer_colors), layer.line_count)
+            for line_info in self.lines:
+                line_index = line_info['index'] - layer.offset
+                if 0 <= line_index < written:
+                    line_info['shape'].color = layer_colors[line_index]
+    
+    @property
+    def frame_time(self) -> float:
+        """Время рисуемого кадра: шаги симуляции и остаток меньше шага"""
+        return self.sim_time + self.lag
+    
+    def update(self, dt: float, lag: float = 0.0):
+        """
+        Шаг симуляции: геометрия пересчитывается только здесь
+        
+        Кадр вычисляется на frame_time в каждом вызове, в том числе
+        при dt == 0: это интерполяция между шагами, а не лишний шаг.
+        """
+        self.sim_time += dt
+        self.lag = lag
         self.update_lines()
-        batch.draw()
\ No newline at end of file
+    
+    def draw(self, batch: pyglet.graphics.Batch):
+        """Отрисовка уже вычисленной геометрии"""
+        if all(layer.lod is None for layer in self.layers):
+            batch.draw()
+            return
+        
+        started = time_module.perf_counter()
+        batch.draw()
+        self._draw_ms = (time_module.perf_counter() - started) * 1000.0
@@ -0,0 +1,13 @@
+"""
+Бенчмарки математического движка и паттернов
+
+Запуск без окна:
+    python -m benchmarks --output results.json
+    python -m benchmarks --baseline baseline.json
+"""
+from .runner import benchmark, BenchmarkRunner
+
+__all__ = [
+    'benchmark',
+    'BenchmarkRunner'
+]
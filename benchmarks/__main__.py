@@ -0,0 +1,41 @@
+"""
+Запуск бенчмарков: python -m benchmarks [--output FILE] [--baseline FILE]
+"""
+import argparse
+import sys
+
+from .runner import BenchmarkRunner
+from . import bench_parser, bench_functions, bench_patterns  # noqa: F401 - регистрация
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Parametric line engine benchmarks")
+    parser.add_argument("--filter", default=None, help="запускать бенчмарки, имя которых содержит строку")
+    parser.add_argument("--output", default=None, help="сохранить результаты в JSON")
+    parser.add_argument("--baseline", default=None, help="сравнить с сохранённым JSON")
+    parser.add_argument("--threshold", type=float, default=0.1, help="допуск регрессии (доля)")
+    parser.add_argument("--repeat", type=int, default=5, help="число повторов")
+    parser.add_argument("--list", action="store_true", help="только список бенчмарков")
+    args = parser.parse_args()
+    
+    if args.list:
+        print("\n".join(BenchmarkRunner.names(args.filter)))
+        return 0
+    
+    runner = BenchmarkRunner(repeat=args.repeat)
+    report = runner.run(args.filter)
+    
+    if args.output:
+        runner.save(report, args.output)
+    
+    if args.baseline:
+        regressions = runner.compare(report, runner.load(args.baseline), args.threshold)
+        if regressions:
+            print(f"\n{regressions} benchmark(s) slower than baseline")
+            return 1
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""
+Бенчмарки IFunction.evaluate для всех встроенных функций
+"""
+from math_engine.expression_parser import ExpressionParser
+from math_engine.function_library import FunctionLibrary
+from .runner import benchmark
+
+
+PARAMS = {
+    'circle': {"angle": 1.2, "size": 100.0},
+    'square': {"angle": 1.2, "size": 100.0},
+    'ngon': {"angle": 1.2, "size": 100.0, "sides": 6},
+    'fixed': {"x": 10.0, "y": 20.0},
+    'sum': {"functions": [
+        {"func": "circle", "size": "40", "angle": "time"},
+        {"func": "circle", "size": "20", "angle": "time + pi"}
+    ]},
+    'multiply': {"operation": "elementwise", "functions": [
+        {"func": "circle", "size": "100", "angle": "n"},
+        {"func": "square", "size": "2", "angle": "time"}
+    ]},
+    'morph': {"t": "(sin(time) + 1) / 2", "functions": [
+        {"func": "circle", "size": "100", "angle": "n"},
+        {"func": "square", "size": "80", "angle": "n"}
+    ]},
+    'directed_line': {
+        "from": {"func": "circle", "size": "100", "angle": "n"},
+        "to": {"func": "fixed", "x": "0", "y": "0"},
+        "distance": "current_length*0.5", "offset": "5"
+    },
+}
+
+
+def _register(function_id: str, params):
+    @benchmark(f"function.evaluate[{function_id}]", group="functions")
+    def _evaluate():
+        library = FunctionLibrary(ExpressionParser())
+        func = library.get(function_id)
+        context = {'n': 3, 'time': 1.5, 'count': 60, 'angle_step': 0.1}
+        return lambda: func.evaluate(params, context)
+
+
+for _function_id, _params in PARAMS.items():
+    _register(_function_id, _params)
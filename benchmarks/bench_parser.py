@@ -0,0 +1,33 @@
+"""
+Бенчмарки ExpressionParser
+"""
+import numpy as np
+
+from math_engine.expression_parser import ExpressionParser
+from .runner import benchmark
+
+
+EXPRESSIONS = {
+    'constant': "140",
+    'index': "300 + sin(n*angle_step*10)*25",
+    'mixed': "(n+0.43 + sin(time*10)*0.2)*angle_step + time*0.3",
+}
+
+
+def _register(label: str, expression: str):
+    @benchmark(f"parser.parse[{label}]", group="parser")
+    def _parse():
+        parser = ExpressionParser()
+        context = {'n': 7, 'time': 1.5, 'count': 60}
+        return lambda: parser.parse(expression, context)
+    
+    @benchmark(f"parser.parse_array[{label}, n=10k]", group="parser")
+    def _parse_array():
+        parser = ExpressionParser()
+        n = np.arange(10_000)
+        context = {'time': 1.5, 'count': 10_000}
+        return lambda: parser.parse_array(expression, n, context)
+
+
+for _label, _expression in EXPRESSIONS.items():
+    _register(_label, _expression)
@@ -0,0 +1,52 @@
+"""
+Бенчмарки ConnectPattern и полного кадра
+"""
+import itertools
+
+import numpy as np
+
+from math_engine.expression_parser import ExpressionParser
+from patterns.connect_pattern import ConnectPattern
+from .runner import benchmark
+from .scenes import DEMO_SCENE, COMPOSITE_SCENE, scene
+
+
+FRAME_COUNTS = (60, 1_000, 10_000, 100_000)
+
+
+def make_pattern(config) -> ConnectPattern:
+    pattern = ConnectPattern()
+    pattern.set_config(config)
+    pattern.set_expression_parser(ExpressionParser())
+    return pattern
+
+
+@benchmark("pattern.calculate_line[demo, one time]", group="patterns")
+def _calculate_line_same_time():
+    pattern = make_pattern(scene(DEMO_SCENE, 60))
+    return lambda: pattern.calculate_line(17, 1.5)
+
+
+@benchmark("pattern.calculate_line[demo, new time]", group="patterns")
+def _calculate_line_new_time():
+    pattern = make_pattern(scene(DEMO_SCENE, 60))
+    clock = itertools.count(0.0, 1 / 60)
+    return lambda: pattern.calculate_line(17, next(clock))
+
+
+def _register_frame(label: str, base, count: int):
+    @benchmark(f"frame[{label}, count={count}]", group="frames")
+    def _frame():
+        pattern = make_pattern(scene(base, count))
+        buffer = np.empty((pattern.get_line_count(), 4), dtype=np.float32)
+        clock = itertools.count(0.0, 1 / 60)
+        
+        # Эквивалент ParametricLinesAddon.update_lines: кадр + запись в буфер
+        def frame():
+            buffer[:] = pattern.calculate_all_lines(next(clock))
+        return frame
+
+
+for _count in FRAME_COUNTS:
+    _register_frame("demo", DEMO_SCENE, _count)
+    _register_frame("composite", COMPOSITE_SCENE, _count)
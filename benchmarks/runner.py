@@ -0,0 +1,140 @@
+"""
+Регистрация, запуск и сравнение бенчмарков
+"""
+import json
+import platform
+import statistics
+import sys
+import time
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+import numpy as np
+
+
+# name -> (group, фабрика: возвращает функцию без аргументов для замера)
+_REGISTRY: Dict[str, Tuple[str, Callable[[], Callable[[], Any]]]] = {}
+
+
+def benchmark(name: str, group: str = "misc"):
+    """
+    Декоратор регистрации бенчмарка
+    
+    Декорируемая функция выполняет подготовку и возвращает
+    функцию без аргументов, время которой измеряется.
+    """
+    def decorator(factory: Callable[[], Callable[[], Any]]):
+        _REGISTRY[name] = (group, factory)
+        return factory
+    return decorator
+
+
+class BenchmarkRunner:
+    """Запуск зарегистрированных бенчмарков"""
+    
+    def __init__(self, repeat: int = 5, min_time: float = 0.2):
+        self.repeat = repeat
+        self.min_time = min_time  # Минимальная длительность одного повтора, с
+    
+    @staticmethod
+    def names(pattern: Optional[str] = None) -> List[str]:
+        return [name for name in _REGISTRY if not pattern or pattern in name]
+    
+    def run(self, pattern: Optional[str] = None) -> Dict[str, Any]:
+        """Запуск бенчмарков, имя которых содержит pattern"""
+        results = {}
+        
+        for name in self.names(pattern):
+            group, factory = _REGISTRY[name]
+            try:
+                results[name] = {'group': group, **self._measure(factory())}
+                print(f"  {name:<48} {self._format_time(results[name]['median'])}")
+            except Exception as e:
+                print(f"  {name:<48} error: {e}")
+        
+        return {'meta': self._meta(), 'results': results}
+    
+    def _measure(self, func: Callable[[], Any]) -> Dict[str, Any]:
+        """Время одного вызова: подбор числа итераций и повторы"""
+        func()  # Прогрев: компиляция, кэши
+        
+        number = 1
+        while True:
+            started = time.perf_counter()
+            for _ in range(number):
+                func()
+            elapsed = time.perf_counter() - started
+            if elapsed >= self.min_time or number >= 1 << 20:
+                break
+            number *= 10 if elapsed < self.min_time / 10 else 2
+        
+        timings = [elapsed / number]
+        for _ in range(self.repeat - 1):
+            started = time.perf_counter()
+            for _ in range(number):
+                func()
+            timings.append((time.perf_counter() - started) / number)
+        
+        return {
+            'number': number,
+            'min': min(timings),
+            'median': statistics.median(timings),
+            'max': max(timings),
+        }
+    
+    @staticmethod
+    def _meta() -> Dict[str, Any]:
+        return {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+        }
+    
+    @staticmethod
+    def _format_time(seconds: float) -> str:
+        if seconds >= 1e-3:
+            return f"{seconds * 1e3:10.3f} ms"
+        return f"{seconds * 1e6:10.3f} us"
+    
+    @staticmethod
+    def save(report: Dict[str, Any], path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {path}")
+    
+    @staticmethod
+    def load(path: str) -> Dict[str, Any]:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    @classmethod
+    def compare(cls, report: Dict[str, Any], baseline: Dict[str, Any],
+                threshold: float = 0.1) -> int:
+        """
+        Сравнение медиан с базовым прогоном
+        
+        Returns:
+            Число бенчмарков, ставших медленнее больше чем на threshold
+        """
+        regressions = 0
+        base_results = baseline.get('results', {})
+        
+        print(f"\n{'benchmark':<48} {'baseline':>13} {'current':>13}  ratio")
+        for name, result in report['results'].items():
+            base = base_results.get(name)
+            if base is None:
+                print(f"{name:<48} {'-':>13} {cls._format_time(result['median'])}")
+                continue
+            
+            ratio = result['median'] / base['median'] if base['median'] else float('inf')
+            mark = ''
+            if ratio > 1 + threshold:
+                mark = '  slower'
+                regressions += 1
+            elif ratio < 1 - threshold:
+                mark = '  faster'
+            
+            print(f"{name:<48} {cls._format_time(base['median'])} "
+                  f"{cls._format_time(result['median'])}  {ratio:5.2f}x{mark}")
+        
+        return regressions
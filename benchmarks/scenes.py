@@ -0,0 +1,47 @@
+"""
+Сцены для бенчмарков
+"""
+import copy
+from typing import Dict, Any
+
+
+# Демонстрационная сцена (как example_parametric.json)
+DEMO_SCENE = {
+    "pattern": "connect",
+    "count": 60,
+    "center": [512, 384],
+    "points": [
+        {"func": "circle", "size": "300 + sin(n*angle_step*10)*25", "angle": "n*angle_step + time*0.3"},
+        {"func": "ngon", "size": "320 + sin(n*angle_step*10)*25", "angle": "(n+0.43 + sin(time*10)*0.2)*angle_step + time*0.3", "sides": 6},
+        {"func": "ngon", "size": 140, "angle": "(n+0.5 - sin(time*10)*0.2)*angle_step + time*0.3", "sides": 3},
+        {"func": "ngon", "size": "320 + sin(n*angle_step*10)*25", "angle": "(n+0.57 + sin(time*10)*0.2)*angle_step + time*0.3", "sides": 6},
+        {"func": "circle", "size": "300 + sin((n+1)*angle_step*10)*25", "angle": "(n+1)*angle_step + time*0.3"}
+    ]
+}
+
+# Сцена с композитными функциями: sum из morph, directed_line
+COMPOSITE_SCENE = {
+    "pattern": "connect",
+    "count": 60,
+    "center": [512, 384],
+    "points": [
+        {"func": "sum", "functions": [
+            {"func": "morph", "t": "(sin(time) + 1) / 2", "functions": [
+                {"func": "circle", "size": "200", "angle": "n*angle_step"},
+                {"func": "square", "size": "180", "angle": "n*angle_step"}
+            ]},
+            {"func": "circle", "size": "20", "angle": "time*5 + n"}
+        ]},
+        {"func": "directed_line",
+         "from": {"func": "circle", "size": "250", "angle": "n*angle_step + time*0.2"},
+         "to": {"func": "fixed", "x": "0", "y": "0"},
+         "distance": "current_length*0.3", "offset": "sin(n + time)*10"}
+    ]
+}
+
+
+def scene(base: Dict[str, Any], count: int) -> Dict[str, Any]:
+    """Копия сцены с заданным count"""
+    result = copy.deepcopy(base)
+    result['count'] = count
+    return result
@@ -0,0 +1,84 @@
+"""
+Отслеживание файла конфигурации в фоновом потоке
+
+Поток опрашивает mtime файла; при изменении загружает JSON
+и вызывает prepare(data) - разбор, валидацию и компиляцию сцены.
+Готовый результат забирает основной цикл через poll() и подменяет
+сцену целиком, пока старая продолжает анимироваться.
+"""
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from config_loader import ConfigLoader
+
+
+class ConfigWatcher:
+    """Фоновый поток подготовки сцены при изменении файла"""
+    
+    def __init__(self, config_file: str, prepare: Callable[[Dict[str, Any]], Any],
+                 poll_interval: float = 0.5):
+        self.config_file = config_file
+        self.prepare = prepare
+        self.poll_interval = poll_interval
+        
+        self._lock = threading.Lock()
+        self._ready: Optional[Any] = None  # Последняя подготовленная сцена
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._mtime = self._get_mtime()
+    
+    def start(self):
+        """Запуск потока отслеживания"""
+        if self._thread is not None:
+            return
+        
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ConfigWatcher", daemon=True)
+        self._thread.start()
+        print(f"ConfigWatcher: watching {self.config_file}")
+    
+    def stop(self):
+        """Остановка потока"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval * 2)
+            self._thread = None
+    
+    def poll(self) -> Optional[Any]:
+        """
+        Готовая сцена, если она есть (вызывается из основного потока)
+        
+        Если файл изменился несколько раз, возвращается только
+        последняя подготовленная версия.
+        """
+        with self._lock:
+            ready, self._ready = self._ready, None
+        return ready
+    
+    def _get_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.config_file).st_mtime_ns
+        except OSError:
+            return None
+    
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            mtime = self._get_mtime()
+            if mtime is None or mtime == self._mtime:
+                continue
+            self._mtime = mtime
+            
+            print(f"\n=== {self.config_file} changed, preparing scene ===")
+            data = ConfigLoader.load_json(self.config_file)
+            if not data:
+                continue
+            
+            try:
+                prepared = self.prepare(data)
+            except Exception as e:
+                print(f"ConfigWatcher: error preparing scene: {e}")
+                continue
+            
+            with self._lock:
+                self._ready = prepared
@@ -1,21 +1,34 @@
 import pyglet
-from typing import Dict, Any
-from pyglet.math import Mat4
+from typing import Dict, Any, Optional
+from pyglet.math import Mat4, Vec3
 from addon_manager import AddonManager
 from config_loader import ConfigLoader
+from config_watcher import ConfigWatcher
+from math_engine.diagnostics import diagnostics
+from profiler import FrameProfiler, ProfilerOverlay
 
 
 class LineDrawerApp:
     """Основной класс приложения с поддержкой анимации"""
     
-    def __init__(self, config_file: str, width: int = 800, height: int = 600):
+    def __init__(self, config_file: str, width: int = 800, height: int = 600,
+                 profile_csv: Optional[str] = None, watch: bool = False):
         self.config_file = config_file
         self.width = width
         self.height = height
         self.addon_manager = AddonManager()
+        
+        # Профилирование стадий кадра (оверлей - клавиша P)
+        self.profiler = FrameProfiler(csv_path=profile_csv)
+        self.addon_manager.set_profiler(self.profiler)
         self.batches = {}
         self.update_interval = 1/60  # 60 FPS
         
+        # Фиксированный шаг симуляции
+        self.fixed_timestep = 1/60
+        self.max_frame_skip = 5  # Больше шагов за раз - отставание отбрасывается
+        self._time_accumulator = 0.0
+        
         # Центр окна (будет обновляться)
         self.window_center = [width // 2, height // 2]
         
@@ -27,14 +40,22 @@ class LineDrawerApp:
             config=config
         )
         
+        self.profiler_overlay = ProfilerOverlay(self.profiler)
+        
         # Устанавливаем начальную проекцию
         self.window.projection = Mat4.orthogonal_projection(0, width, 0, height, -1, 1)
         
         # Настраиваем события
         self.setup_events()
         
-        # Загружаем конфигурацию сразу
-        self.load_config()
+        # Автоматическая перезагрузка: сцена готовится в фоновом потоке
+        self.config_watcher = None
+        if watch:
+            self.config_watcher = ConfigWatcher(
+                config_file,
+                lambda data: self.addon_manager.prepare_json(data, prepare_addons=True)
+            )
+            self.config_watcher.start()
         
         # Запускаем таймер для обновления анимации
         pyglet.clock.schedule_interval(self.update, self.update_interval)
@@ -48,6 +69,8 @@ class LineDrawerApp:
             pyglet.gl.glClearColor(0, 0, 0, 1)
             self.window.clear()
             self.draw()
+            self.profiler_overlay.draw()
+            self.profiler.end_frame()
         
         @self.window.event
         def on_key_press(symbol, modifiers):
@@ -58,6 +81,15 @@ class LineDrawerApp:
                 self.window.close()
             elif symbol == pyglet.window.key.F:
                 self.window.set_fullscreen(not self.window.fullscreen)
+            elif symbol == pyglet.window.key.P:
+                self.profiler_overlay.toggle()
+        
+        @self.window.event
+        def on_close():
+            if self.config_watcher is not None:
+                self.config_watcher.stop()
+            self.addon_manager.close()
+            self.profiler.close_csv()
         
         @self.window.event
         def on_mouse_press(x, y, button, modifiers):
@@ -74,33 +106,66 @@ class LineDrawerApp:
             # Устанавливаем viewport
             pyglet.gl.glViewport(0, 0, width, height)
             
-            # Обновляем проекцию для нового размера окна
+            # Обновляем проекцию для нового размера окна; геометрию
+            # к новому центру переносит матрица вида в draw()
             self.window.projection = Mat4.orthogonal_projection(0, width, 0, height, -1, 1)
-            
-            # Перезагружаем конфигурацию с новым центром
-            self.load_config()
     
     def register_addon(self, addon):
         """Регистрация аддона"""
         self.addon_manager.register_addon(addon)
     
-    def load_config(self):
-        """Загрузка и применение конфигурации"""
+    def load_config(self, force: bool = False):
+        """
+        Загрузка и применение конфигурации
+        
+        Args:
+            force: пересоздать все batch, даже если данные не изменились
+        """
         print(f"\nLoading configuration from {self.config_file}")
         data = ConfigLoader.load_json(self.config_file)
         
+        # Ошибки новой сцены сообщаются заново
+        diagnostics.clear()
+        
         if data:
-            # Обрабатываем все данные
-            self.batches = self.addon_manager.process_json(data)
+            # Обрабатываем все данные; неизменённые аддоны сохраняются
+            self.batches = self.addon_manager.process_json(data, force=force)
             print(f"Created {len(self.batches)} batches")
         else:
             print("Failed to load configuration")
             self.batches = {}
     
+    def apply_watched_config(self):
+        """Подмена сцены, подготовленной ConfigWatcher, одним шагом"""
+        if self.config_watcher is None:
+            return
+        
+        entries = self.config_watcher.poll()
+        if entries is not None:
+            diagnostics.clear()
+            self.batches = self.addon_manager.apply_prepared(entries)
+            print(f"Swapped in {len(self.batches)} batches")
+    
     def update(self, dt):
-        """Обновление состояния для анимации"""
-        # Анимация обновляется в аддонах, но можно добавить здесь логику
-        pass
+        """Обновление состояния для анимации с фиксированным шагом"""
+        self.apply_watched_config()
+        diagnostics.report()
+        
+        self._time_accumulator += dt
+        steps = int(self._time_accumulator / self.fixed_timestep)
+        self._time_accumulator -= steps * self.fixed_timestep
+        
+        # Вычисления не успевают - пропускаем кадры, но не больше max_frame_skip
+        if steps > self.max_frame_skip:
+            steps = self.max_frame_skip
+        
+        # Геометрия зависит только от времени: промежуточные шаги
+        # не вычисляются, аддоны получают весь прошедший интервал сразу.
+        # Остаток меньше шага передаётся как lag: тик таймера чуть раньше
+        # шага не даёт кадра без движения, а следующий - двойного шага.
+        # Поэтому аддоны вычисляют кадр и при steps == 0: тик таймера
+        # (update_interval) - это кадр, и пропуск повторил бы прежний
+        self.addon_manager.update(steps * self.fixed_timestep, self._time_accumulator)
     
     def draw(self):
         """Отрисовка всех элементов"""
@@ -109,12 +174,22 @@ class LineDrawerApp:
                 try:
                     # Проверяем, есть ли у аддона специальный метод draw
                     addon = self.addon_manager.addons.get(batch_name)
-                    if hasattr(addon, 'draw'):
-                        addon.draw(batch)
-                    else:
-                        batch.draw()
+                    self.window.view = self._view_for(addon)
+                    with self.profiler.stage(f"{batch_name}.draw"):
+                        if hasattr(addon, 'draw'):
+                            addon.draw(batch)
+                        else:
+                            batch.draw()
                 except Exception as e:
                     print(f"Error drawing batch {batch_name}: {e}")
+            
+            self.window.view = Mat4()
+    
+    @staticmethod
+    def _view_for(addon) -> Mat4:
+        """Матрица вида аддона: перенос на view_offset()"""
+        offset_x, offset_y = addon.view_offset() if hasattr(addon, 'view_offset') else (0.0, 0.0)
+        return Mat4.from_translation(Vec3(offset_x, offset_y, 0.0))
     
     def run(self):
         """Запуск приложения"""
@@ -122,8 +197,15 @@ class LineDrawerApp:
         print("Parametric JSON Line Drawer")
         print("Controls:")
         print("  R - reload config")
+        if self.config_watcher is not None:
+            print(f"  (watching {self.config_file} for changes)")
         print("  ESC - exit")
         print("  F - fullscreen")
+        print("  P - profiler overlay")
         print("="*50)
         
+        # Аддоны регистрируются после создания приложения:
+        # сцена загружается один раз, перед запуском цикла
+        self.load_config()
+        
         pyglet.app.run()
\ No newline at end of file
@@ -0,0 +1,310 @@
+"""
+Запекание периодической анимации в файл кадров
+
+Если время входит в сцену только через периодические функции
+(sin, cos, triangle) и углы функций-фигур, вся анимация повторяется
+с периодом 2*pi / НОД(коэффициентов при time). Кадры одного периода
+вычисляются один раз и сохраняются в .npy-файл; воспроизведение
+читает кадр через np.memmap без вычисления выражений.
+"""
+import ast
+import hashlib
+import json
+import math
+import os
+from fractions import Fraction
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+import numpy as np
+
+from math_engine.expression_parser import ExpressionParser
+
+
+# Каталог запечённых кадров по умолчанию
+BAKE_DIR = ".bake"
+
+# Кадров в секунду по умолчанию
+DEFAULT_FPS = 60
+
+# Ограничение длины запекаемой анимации, кадров
+MAX_FRAMES = 36000
+
+# Знаменатель при поиске рационального коэффициента при time
+MAX_DENOMINATOR = 1000
+
+# Функции, периодические по первому аргументу с периодом 2*pi
+PERIODIC_CALLS = frozenset(('sin', 'cos', 'triangle'))
+
+# Параметры-углы функций: значение берётся по модулю 2*pi
+PERIODIC_PARAMS = {
+    'circle': ('angle', 'rotation'),
+    'square': ('angle', 'rotation'),
+    'ngon': ('angle', 'rotation'),
+    'directed_line': ('rotation',),
+}
+
+
+class PeriodDetector:
+    """Поиск периода анимации по выражениям точек"""
+    
+    def __init__(self, expression_parser: Optional[ExpressionParser] = None):
+        self.expression_parser = expression_parser or ExpressionParser()
+        self.builtin_names = frozenset(self.expression_parser.builtins)
+    
+    def detect(self, points: List[Any]) -> Optional[float]:
+        """
+        Период анимации в секундах
+        
+        Returns:
+            0.0 - сцена не зависит от времени,
+            None - период не найден (время входит непериодически
+            или коэффициенты несоизмеримы)
+        """
+        coefficients: List[float] = []
+        for point in points:
+            if not self._collect_point(point, coefficients):
+                return None
+        
+        if not coefficients:
+            return 0.0
+        
+        step = None
+        for k in coefficients:
+            fraction = Fraction(abs(k)).limit_denominator(MAX_DENOMINATOR)
+            if abs(float(fraction) - abs(k)) > 1e-9 * max(1.0, abs(k)):
+                return None
+            step = fraction if step is None else Fraction(
+                math.gcd(step.numerator, fraction.numerator),
+                step.denominator * fraction.denominator // math.gcd(step.denominator, fraction.denominator)
+            )
+        
+        return 2 * math.pi / float(step)
+    
+    def _collect_point(self, config: Any, coefficients: List[float]) -> bool:
+        """Обход конфигурации точки с вложенными functions/from/to"""
+        if isinstance(config, list):
+            return all(self._collect_point(item, coefficients) for item in config)
+        if not isinstance(config, dict):
+            return True
+        
+        periodic = PERIODIC_PARAMS.get(config.get('func', 'circle'), ())
+        for key, value in config.items():
+            # Цвет не запекается: он вычисляется в каждом кадре
+            if key in ('func', 'color'):
+                continue
+            if isinstance(value, str):
+                if not self._collect_expression(value, key in periodic, coefficients):
+                    return False
+            elif not self._collect_point(value, coefficients):
+                return False
+        
+        return True
+    
+    def _collect_expression(self, expression: str, periodic: bool,
+                            coefficients: List[float]) -> bool:
+        try:
+            node = ast.parse(expression.strip(), mode='eval').body
+        except SyntaxError:
+            return True  # Ошибку выражения сообщит компилятор точек
+        
+        if periodic:
+            return self._collect_periodic(node, coefficients)
+        return self._collect(node, coefficients)
+    
+    def _collect(self, node: ast.AST, coefficients: List[float]) -> bool:
+        """Каждое вхождение time должно быть внутри периодической функции"""
+        if 'time' not in self._names(node):
+            return True
+        
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+                and node.func.id in PERIODIC_CALLS and len(node.args) == 1 and not node.keywords):
+            return self._collect_periodic(node.args[0], coefficients)
+        
+        if isinstance(node, ast.Name):
+            return False
+        
+        return all(self._collect(child, coefficients) for child in ast.iter_child_nodes(node))
+    
+    def _collect_periodic(self, node: ast.AST, coefficients: List[float]) -> bool:
+        """
+        Выражение под периодической функцией (или угол)
+        
+        Слагаемые вида a + k*time дают общий коэффициент k, остальные
+        слагаемые сами должны быть периодическими по time.
+        """
+        total = 0.0
+        for sign, term in self._terms(node):
+            k = self._time_coefficient(term)
+            if k is None:
+                if not self._collect(term, coefficients):
+                    return False
+            else:
+                total += sign * k
+        
+        if total != 0:
+            coefficients.append(total)
+        return True
+    
+    @staticmethod
+    def _terms(node: ast.AST, sign: float = 1.0) -> List[Tuple[float, ast.AST]]:
+        """Слагаемые суммы со знаками"""
+        if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Add, ast.Sub)):
+            right_sign = sign if isinstance(node.op, ast.Add) else -sign
+            return PeriodDetector._terms(node.left, sign) + PeriodDetector._terms(node.right, right_sign)
+        return [(sign, node)]
+    
+    def _time_coefficient(self, node: ast.AST) -> Optional[float]:
+        """Коэффициент k, если node = a + k*time (a не зависит от time)"""
+        if 'time' not in self._names(node):
+            return 0.0
+        
+        if isinstance(node, ast.Name):
+            return 1.0
+        
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            k = self._time_coefficient(node.operand)
+            if k is None:
+                return None
+            return -k if isinstance(node.op, ast.USub) else k
+        
+        if isinstance(node, ast.BinOp):
+            if isinstance(node.op, (ast.Add, ast.Sub)):
+                left = self._time_coefficient(node.left)
+                right = self._time_coefficient(node.right)
+                if left is None or right is None:
+                    return None
+                return left + right if isinstance(node.op, ast.Add) else left - right
+            
+            if isinstance(node.op, ast.Mult):
+                for factor, other in ((node.left, node.right), (node.right, node.left)):
+                    constant = self._constant(factor)
+                    if constant is not None:
+                        k = self._time_coefficient(other)
+                        return None if k is None else constant * k
+                return None
+            
+            if isinstance(node.op, ast.Div):
+                constant = self._constant(node.right)
+                k = self._time_coefficient(node.left)
+                if constant in (None, 0) or k is None:
+                    return None
+                return k / constant
+        
+        return None
+    
+    def _constant(self, node: ast.AST) -> Optional[float]:
+        """Значение подвыражения без переменных"""
+        if self._names(node):
+            return None
+        try:
+            return float(self.expression_parser.parse(ast.unparse(node), {}))
+        except Exception:
+            return None
+    
+    def _names(self, node: ast.AST) -> set:
+        return {
+            child.id for child in ast.walk(node)
+            if isinstance(child, ast.Name) and child.id not in self.builtin_names
+        }
+
+
+class BakedAnimation:
+    """Воспроизведение запечённых кадров из файла"""
+    
+    def __init__(self, frames: np.ndarray, period: float):
+        self.frames = frames  # (frame_count, line_count, 4) float32, memmap
+        self.period = period
+        self.frame_count = len(frames)
+    
+    def frame(self, time: float) -> np.ndarray:
+        """Кадр, ближайший к моменту time (с учётом периода)"""
+        if self.frame_count == 1 or self.period <= 0:
+            return self.frames[0]
+        index = int(round(time % self.period / self.period * self.frame_count)) % self.frame_count
+        return self.frames[index]
+
+
+def bake_key(config: Dict[str, Any], period: float, fps: float) -> str:
+    """Ключ запечённого файла: конфигурация сцены, период и fps"""
+    scene = {key: value for key, value in config.items() if key not in ('bake', 'workers')}
+    source = json.dumps({'scene': scene, 'period': period, 'fps': fps},
+                        sort_keys=True, default=str)
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+
+def load_or_bake(config: Dict[str, Any], line_count: int,
+                 calculate: Callable[[float], np.ndarray]) -> Optional[BakedAnimation]:
+    """
+    Запечённая анимация сцены с ключом "bake"
+    
+    "bake": true - период ищется по выражениям;
+    "bake": {"period": 62.8, "fps": 30, "file": "scene.npy"} - явно.
+    Файл с тем же ключом используется повторно без вычислений.
+    
+    Args:
+        calculate: вычисление линий кадра для момента времени
+    """
+    bake_config = config.get('bake')
+    if not bake_config or line_count <= 0:
+        return None
+    if not isinstance(bake_config, dict):
+        bake_config = {}
+    
+    fps = float(bake_config.get('fps', DEFAULT_FPS))
+    period = bake_config.get('period')
+    if period is None:
+        period = PeriodDetector().detect(config.get('points', []))
+        if period is None:
+            print("FrameBake: animation is not periodic in time, set \"bake\": {\"period\": ...}")
+            return None
+        print(f"FrameBake: detected period {period:.4f}s")
+    period = float(period)
+    
+    frame_count = max(1, int(round(period * fps)))
+    if frame_count > MAX_FRAMES:
+        print(f"FrameBake: period {period:.2f}s needs {frame_count} frames (limit {MAX_FRAMES})")
+        return None
+    
+    key = bake_key(config, period, fps)
+    path = bake_config.get('file') or os.path.join(BAKE_DIR, f"{key}.npy")
+    meta_path = path + ".json"
+    
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            if json.load(f).get('key') == key:
+                frames = np.load(path, mmap_mode='r')
+                print(f"FrameBake: loaded {len(frames)} frames from {path}")
+                return BakedAnimation(frames, period)
+    except (OSError, ValueError):
+        pass
+    
+    return _bake(path, meta_path, key, period, frame_count, line_count, calculate)
+
+
+def _bake(path: str, meta_path: str, key: str, period: float, frame_count: int,
+          line_count: int, calculate: Callable[[float], np.ndarray]) -> Optional[BakedAnimation]:
+    """Вычисление всех кадров периода и запись во временный файл с заменой"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    
+    print(f"FrameBake: baking {frame_count} frames x {line_count} lines to {path}")
+    temp_path = path + ".tmp.npy"
+    try:
+        frames = np.lib.format.open_memmap(temp_path, mode='w+', dtype=np.float32,
+                                           shape=(frame_count, line_count, 4))
+        frame_time = period / frame_count
+        for index in range(frame_count):
+            frames[index] = calculate(index * frame_time)
+        frames.flush()
+        del frames
+        
+        os.replace(temp_path, path)
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump({'key': key, 'period': period, 'frames': frame_count,
+                       'lines': line_count}, f)
+    except Exception as e:
+        print(f"FrameBake: error baking frames: {e}")
+        return None
+    
+    return BakedAnimation(np.load(path, mmap_mode='r'), period)
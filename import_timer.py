@@ -0,0 +1,119 @@
+"""
+Время импорта модулей приложения
+
+Как python -X importtime, но только для модулей приложения и их
+прямых зависимостей: время вложенных импортов внешних пакетов
+(numpy, pyglet) входит в строку пакета, который импортировал код
+приложения. Включается флагом --import-report в main.py.
+"""
+import importlib.abc
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """Обёртка загрузчика: замер create_module + exec_module"""
+    
+    def __init__(self, loader, timer: 'ImportTimer'):
+        self.loader = loader
+        self.timer = timer
+    
+    def create_module(self, spec):
+        # Замер начинается здесь: модули-расширения загружаются в create_module
+        self.timer._enter(spec.name)
+        try:
+            return self.loader.create_module(spec)
+        except BaseException:
+            self.timer._leave(spec.name)
+            raise
+    
+    def exec_module(self, module):
+        # Модуль видит свой настоящий загрузчик (ресурсы, isinstance)
+        module.__loader__ = self.loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self.loader
+        
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.timer._leave(module.__name__)
+
+
+class ImportTimer(importlib.abc.MetaPathFinder):
+    """Замер импортов через sys.meta_path"""
+    
+    def __init__(self, root: Optional[str] = None):
+        self.root = os.path.abspath(root or os.path.dirname(__file__)) + os.sep
+        self.started = time.perf_counter()
+        
+        # Модуль -> (время с вложенными импортами, импортировавший модуль)
+        self.records: Dict[str, Tuple[float, Optional[str]]] = {}
+        self._origins: Dict[str, bool] = {}
+        self._stack: List[Tuple[str, float]] = []
+        self._finding = False
+    
+    def install(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+    
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+    
+    def find_spec(self, fullname, path, target=None):
+        if self._finding:
+            return None
+        
+        # Поиск остальными искателями, загрузчик найденного модуля оборачивается
+        self._finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, 'find_spec'):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._finding = False
+        
+        if spec.loader is None or not hasattr(spec.loader, 'exec_module'):
+            return spec
+        
+        self._origins[fullname] = bool(spec.origin) and os.path.abspath(spec.origin).startswith(self.root)
+        spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+    
+    def _enter(self, name: str):
+        self._stack.append((name, time.perf_counter()))
+    
+    def _leave(self, name: str):
+        _, started = self._stack.pop()
+        parent = self._stack[-1][0] if self._stack else None
+        self.records[name] = (time.perf_counter() - started, parent)
+    
+    def is_app_module(self, name: str) -> bool:
+        return self._origins.get(name, False)
+    
+    def report(self, limit: int = 20) -> str:
+        """
+        Таблица импортов: модули приложения и внешние пакеты,
+        импортированные из кода приложения напрямую
+        """
+        rows = []
+        for name, (total, parent) in self.records.items():
+            if self.is_app_module(name) or parent is None or self.is_app_module(parent):
+                rows.append((total, name, self.is_app_module(name)))
+        rows.sort(reverse=True)
+        
+        elapsed = time.perf_counter() - self.started
+        lines = [f"Import time: {elapsed * 1000:.1f} ms since start, "
+                 f"{len(self.records)} modules imported"]
+        lines.append(f"  {'total ms':>9}  module")
+        for total, name, is_app in rows[:limit]:
+            suffix = "" if is_app else "  (external)"
+            lines.append(f"  {total * 1000:9.1f}  {name}{suffix}")
+        return "\n".join(lines)
@@ -0,0 +1,93 @@
+"""
+Адаптивный уровень детализации по бюджету времени кадра
+
+Уровень - шаг по итерациям паттерна: вычисляется и рисуется
+каждая stride-я итерация. Время кадра сглаживается; при превышении
+бюджета шаг растёт сразу в нужное число раз, а уменьшается по одному
+уровню и только при запасе. Между сменами уровня - пауза, чтобы
+детализация не мерцала.
+"""
+import math
+from typing import Dict, Optional
+
+import numpy as np
+
+
+class LevelOfDetail:
+    """Выбор шага итераций по бюджету времени кадра"""
+    
+    # Допустимые шаги по итерациям
+    STRIDES = (1, 2, 4, 8, 16, 32, 64)
+    
+    # Коэффициент экспоненциального сглаживания времени кадра
+    SMOOTHING = 0.2
+    
+    # Кадров после смены уровня до следующего решения
+    COOLDOWN_FRAMES = 20
+    
+    # Возврат к более детальному уровню (примерно вдвое дороже),
+    # только если время кадра ниже этой доли бюджета
+    RESTORE_RATIO = 0.4
+    
+    def __init__(self, budget_ms: float, iterations: int):
+        self.budget_ms = budget_ms
+        self.iterations = iterations
+        self.level = 0
+        self.average_ms: Optional[float] = None
+        self._cooldown = self.COOLDOWN_FRAMES
+        self._indices: Dict[int, np.ndarray] = {}
+    
+    @property
+    def stride(self) -> int:
+        return self.STRIDES[self.level]
+    
+    def indices(self) -> np.ndarray:
+        """
+        Итерации текущего уровня, равномерно по всему паттерну
+        
+        Массив один и тот же для уровня: по нему кэшируются
+        параметры, зависящие только от n.
+        """
+        stride = self.stride
+        if stride not in self._indices:
+            self._indices[stride] = np.arange(0, self.iterations, stride, dtype=np.float64)
+        return self._indices[stride]
+    
+    def record(self, frame_ms: float) -> bool:
+        """
+        Учёт времени кадра (вычисление + отрисовка)
+        
+        Returns:
+            True, если уровень изменился
+        """
+        if self.average_ms is None:
+            self.average_ms = frame_ms
+        else:
+            self.average_ms += (frame_ms - self.average_ms) * self.SMOOTHING
+        
+        if self._cooldown > 0:
+            self._cooldown -= 1
+            return False
+        
+        level = self.level
+        if self.average_ms > self.budget_ms:
+            # Стоимость почти пропорциональна числу итераций
+            steps = math.ceil(math.log2(self.average_ms / self.budget_ms))
+            level = min(self.level + max(1, steps), self._max_level())
+        elif self.level > 0 and self.average_ms < self.budget_ms * self.RESTORE_RATIO:
+            level = self.level - 1
+        
+        if level == self.level:
+            return False
+        
+        self.level = level
+        self.average_ms = None
+        self._cooldown = self.COOLDOWN_FRAMES
+        return True
+    
+    def _max_level(self) -> int:
+        """Самый грубый уровень, на котором остаётся хотя бы две итерации"""
+        level = 0
+        while level + 1 < len(self.STRIDES) and self.iterations // self.STRIDES[level + 1] >= 2:
+            level += 1
+        return level
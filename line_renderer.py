@@ -0,0 +1,123 @@
+"""
+Рендерер линий через один вершинный буфер
+"""
+import pyglet
+import numpy as np
+from typing import Optional, Sequence
+
+
+_vertex_source = """#version 330 core
+    in vec2 position;
+    in vec4 colors;
+    out vec4 vertex_colors;
+    
+    uniform WindowBlock
+    {
+        mat4 projection;
+        mat4 view;
+    } window;
+    
+    void main()
+    {
+        gl_Position = window.projection * window.view * vec4(position, 0.0, 1.0);
+        vertex_colors = colors;
+    }
+"""
+
+_fragment_source = """#version 330 core
+    in vec4 vertex_colors;
+    out vec4 final_colors;
+    
+    void main()
+    {
+        final_colors = vertex_colors;
+    }
+"""
+
+
+def get_line_shader() -> pyglet.graphics.shader.ShaderProgram:
+    """Шейдер линий, один на GL-контекст"""
+    object_space = pyglet.gl.current_context.object_space
+    try:
+        return object_space.parametric_line_shader
+    except AttributeError:
+        object_space.parametric_line_shader = pyglet.graphics.shader.ShaderProgram(
+            pyglet.graphics.shader.Shader(_vertex_source, 'vertex'),
+            pyglet.graphics.shader.Shader(_fragment_source, 'fragment'),
+        )
+        return object_space.parametric_line_shader
+
+
+class LineBuffer:
+    """
+    Все отрезки паттерна в одном вершинном списке GL_LINES
+    
+    Координаты кадра записываются в буфер одной операцией
+    вместо установки x, y, x2, y2 у каждой pyglet.shapes.Line.
+    """
+    
+    def __init__(self, line_count: int, batch: pyglet.graphics.Batch,
+                 group: Optional[pyglet.graphics.Group] = None,
+                 color: Sequence[int] = (255, 255, 255, 255)):
+        self.line_count = line_count
+        self.vertex_list = get_line_shader().vertex_list(
+            line_count * 2, pyglet.gl.GL_LINES,
+            batch=batch, group=group,
+            position='f', colors='Bn'
+        )
+        self.set_color(color)
+    
+    def positions(self) -> np.ndarray:
+        """
+        Массив float32 формы (line_count, 4) поверх памяти буфера
+        
+        Обращение помечает область изменённой, поэтому перед отрисовкой
+        batch отправит её в видеопамять одним вызовом.
+        Вид нельзя хранить между кадрами: буфер может переехать.
+        """
+        region = self.vertex_list.position
+        return np.ctypeslib.as_array(region).reshape(self.line_count, 4)
+    
+    def update(self, lines: np.ndarray, start: int = 0, count: Optional[int] = None):
+        """
+        Запись координат линий start..start+count-1: массив (n, 4) x1, y1, x2, y2
+        
+        Если строк меньше count (по умолчанию - до конца буфера),
+        остальные линии диапазона вырождаются в точку (0, 0)
+        и ничего не рисуют.
+        """
+        if count is None:
+            count = self.line_count - start
+        target = self.positions()[start:start + count]
+        written = len(lines)
+        target[:written] = lines
+        if written < count:
+            target[written:] = 0.0
+    
+    def set_color(self, color: Sequence[int]):
+        """Один цвет RGB(A) для всех линий"""
+        color = tuple(color)
+        if len(color) == 3:
+            color += (255,)
+        colors = np.ctypeslib.as_array(self.vertex_list.colors)
+        colors.reshape(-1, 4)[:] = color[:4]
+    
+    def update_colors(self, colors: np.ndarray, start: int = 0, count: Optional[int] = None):
+        """
+        Запись цветов линий start..start+count-1: массив uint8 (n, 4) RGBA
+        
+        Обе вершины линии получают цвет линии; если строк меньше
+        count, цвет остальных линий диапазона не меняется (они
+        вырождены в точку и не видны).
+        """
+        if count is None:
+            count = self.line_count - start
+        written = min(len(colors), count)
+        target = np.ctypeslib.as_array(self.vertex_list.colors).reshape(self.line_count, 2, 4)
+        target[start:start + written] = colors[:written, None, :]
+    
+    def delete(self):
+        """Освобождение вершинного списка"""
+        if self.vertex_list is not None:
+            self.vertex_list.delete()
+            self.vertex_list = None
@@ -2,15 +2,82 @@
 """
 Главный файл приложения для параметрических линий
 """
+import argparse
+import contextlib
+import sys
 
-from core import LineDrawerApp
-from addon_lines import LinesAddon
-from addon_parametric import ParametricLinesAddon
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Parametric JSON Line Drawer")
+    parser.add_argument("scene", nargs="?", default="example_parametric.json",
+                        help="JSON-файл сцены")
+    parser.add_argument("--headless", action="store_true",
+                        help="рендеринг кадров без окна")
+    parser.add_argument("--size", default="1024x768",
+                        help="разрешение WIDTHxHEIGHT")
+    parser.add_argument("--fps", type=float, default=30.0,
+                        help="кадров в секунду (headless)")
+    parser.add_argument("--duration", type=float, default=5.0,
+                        help="длительность в секундах (headless)")
+    parser.add_argument("--start", type=float, default=0.0,
+                        help="время первого кадра (headless)")
+    parser.add_argument("--output", default="frames",
+                        help="каталог PNG или файл сырого потока, '-' - stdout (headless)")
+    parser.add_argument("--format", choices=("png", "raw"), default="png",
+                        help="формат кадров: PNG-файлы или сырой поток RGBA (headless)")
+    parser.add_argument("--watch", action="store_true",
+                        help="перезагружать сцену при изменении файла")
+    parser.add_argument("--profile-csv", default=None,
+                        help="дописывать время кадров и стадий в CSV")
+    parser.add_argument("--import-report", action="store_true",
+                        help="вывести время импорта модулей приложения перед запуском")
+    return parser.parse_args()
+
+
+def report_imports(import_timer):
+    """Отчёт о времени импорта (флаг --import-report)"""
+    if import_timer is not None:
+        import_timer.uninstall()
+        print(import_timer.report())
+
+
+def run_headless(args, width, height, import_timer=None):
+    from offline_renderer import OfflineRenderer
+    
+    # Сырой поток в stdout - сообщения уходят в stderr
+    redirect = contextlib.redirect_stdout(sys.stderr) if args.output == "-" else contextlib.nullcontext()
+    with redirect:
+        try:
+            renderer = OfflineRenderer.from_file(args.scene, width=width, height=height)
+        except ValueError as e:
+            sys.exit(str(e))
+        report_imports(import_timer)
+        renderer.render(args.output, fps=args.fps, duration=args.duration,
+                        start_time=args.start, output_format=args.format)
 
 
 def main():
+    args = parse_args()
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    
+    # Замер импортов до первого импорта модулей приложения
+    import_timer = None
+    if args.import_report:
+        from import_timer import ImportTimer
+        import_timer = ImportTimer()
+        import_timer.install()
+    
+    if args.headless:
+        run_headless(args, width, height, import_timer)
+        return
+    
+    from core import LineDrawerApp
+    from addon_lines import LinesAddon
+    from addon_parametric import ParametricLinesAddon
+    
     # Создаем приложение
-    app = LineDrawerApp("example_parametric.json", width=1024, height=768)
+    app = LineDrawerApp(args.scene, width=width, height=height,
+                        profile_csv=args.profile_csv, watch=args.watch)
     
     # Создаем коллбэк для получения центра окна
     def get_window_center():
@@ -23,6 +90,8 @@ def main():
     parametric_addon = ParametricLinesAddon(window_center_callback=get_window_center)
     app.register_addon(parametric_addon)
     
+    report_imports(import_timer)
+    
     # Запускаем
     app.run()
 
@@ -1,16 +1,56 @@
 """
 Математический движок для параметрических линий
 Обеспечивает вычисление выражений, функций и преобразование координат
+
+Подмодули импортируются при первом обращении к имени (PEP 562):
+импорт math_engine.diagnostics или одного парсера не тянет
+всю библиотеку функций.
 """
+import importlib
+from typing import TYPE_CHECKING
+
+# diagnostics совпадает с именем подмодуля, поэтому импортируется сразу
+from .diagnostics import Diagnostics, diagnostics
+
+# Имя -> подмодуль, из которого оно берётся
+_LAZY_EXPORTS = {
+    'ExpressionParser': 'expression_parser',
+    'FunctionLibrary': 'function_library',
+    'CoordinateSystem': 'coordinate_system',
+    'AnimationEngine': 'animation_engine',
+    'PointCompiler': 'point_compiler',
+    'CompiledPoint': 'point_compiler',
+}
+
+if TYPE_CHECKING:
+    from .expression_parser import ExpressionParser
+    from .function_library import FunctionLibrary
+    from .coordinate_system import CoordinateSystem
+    from .animation_engine import AnimationEngine
+    from .point_compiler import PointCompiler, CompiledPoint
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
 
-from .expression_parser import ExpressionParser
-from .function_library import FunctionLibrary
-from .coordinate_system import CoordinateSystem
-from .animation_engine import AnimationEngine
 
 __all__ = [
     'ExpressionParser',
     'FunctionLibrary', 
     'CoordinateSystem',
-    'AnimationEngine'
-]
\ No newline at end of file
+    'AnimationEngine',
+    'PointCompiler',
+    'CompiledPoint',
+    'Diagnostics',
+    'diagnostics'
+]
@@ -0,0 +1,121 @@
+"""
+Канал диагностики ошибок вычисления
+
+Ошибки из горячих путей (кадр, линия, точка) не печатаются каждый раз:
+первое появление ошибки с данным ключом (место, источник) выводится
+сразу, повторы только считаются и раз в report_interval секунд
+выводятся одной сводкой. Ошибки приходят и из потока ConfigWatcher,
+поэтому записи защищены блокировкой.
+"""
+import json
+import threading
+import time
+from typing import Any, Dict, Tuple, Optional, List
+
+
+def source_key(source: Any) -> str:
+    """
+    Стабильный ключ ошибки по её источнику
+    
+    Выражение - как есть, конфигурация точки - каноническим JSON.
+    Текст исключения в ключ не входит: он может содержать значения.
+    """
+    if isinstance(source, str):
+        return source
+    return json.dumps(source, sort_keys=True, default=str)
+
+
+class _Entry:
+    """Ошибка с одним ключом: текст и счётчики"""
+    
+    __slots__ = ('message', 'total', 'pending')
+    
+    def __init__(self, message: str):
+        self.message = message
+        self.total = 1      # Всего появлений
+        self.pending = 0    # Повторов с последней сводки
+
+
+class Diagnostics:
+    """Дедупликация ошибок и сводка с ограничением частоты"""
+    
+    # Новых ошибок, печатаемых сразу за интервал; остальные - в сводке
+    MAX_IMMEDIATE = 20
+    
+    def __init__(self, report_interval: float = 2.0):
+        self.report_interval = report_interval
+        self._entries: Dict[Tuple[str, str], _Entry] = {}
+        self._last_report = time.monotonic()
+        self._immediate = 0  # Напечатано сразу в текущем интервале
+        self._lock = threading.RLock()
+    
+    def error(self, location: str, source: str, message: str):
+        """
+        Регистрация ошибки
+        
+        Args:
+            location: место (функция, паттерн, аддон)
+            source: источник - выражение или имя функции
+            message: текст для вывода
+        """
+        key = (location, source)
+        with self._lock:
+            entry = self._entries.get(key)
+            
+            if entry is None:
+                entry = self._entries[key] = _Entry(message)
+                if self._immediate < self.MAX_IMMEDIATE:
+                    self._immediate += 1
+                    print(message)
+                else:
+                    entry.pending = 1
+            else:
+                entry.total += 1
+                entry.pending += 1
+            
+            self.report()
+    
+    def report(self, force: bool = False):
+        """Сводка повторов, не чаще раза в report_interval (force - сразу)"""
+        now = time.monotonic()
+        if not force and now - self._last_report < self.report_interval:
+            return
+        
+        with self._lock:
+            elapsed = now - self._last_report
+            self._last_report = now
+            self._immediate = 0
+            
+            repeated = [(entry.pending, entry.message) for entry in self._entries.values() if entry.pending]
+            for entry in self._entries.values():
+                entry.pending = 0
+        
+        if not repeated:
+            return
+        
+        repeated.sort(key=lambda item: item[0], reverse=True)
+        print(f"Diagnostics: {len(repeated)} error(s) repeated in the last {elapsed:.1f}s")
+        for pending, message in repeated:
+            print(f"  {pending}x {message}")
+    
+    def summary(self) -> List[Tuple[str, str, int, str]]:
+        """Все ошибки: (место, источник, всего, текст)"""
+        with self._lock:
+            return [(location, source, entry.total, entry.message)
+                    for (location, source), entry in self._entries.items()]
+    
+    def count(self, location: Optional[str] = None) -> int:
+        """Число появлений ошибок (всех или в одном месте)"""
+        with self._lock:
+            return sum(entry.total for (entry_location, _), entry in self._entries.items()
+                       if location is None or entry_location == location)
+    
+    def clear(self):
+        """Сброс накопленных ошибок (например, при загрузке новой сцены)"""
+        with self._lock:
+            self._entries.clear()
+            self._immediate = 0
+
+
+# Общий канал приложения
+diagnostics = Diagnostics()
@@ -1,15 +1,132 @@
 """
 Парсер математических выражений с поддержкой pow
 """
+import ast
 import math
-from typing import Dict, Any
+from collections import OrderedDict
+from functools import reduce
+from typing import Dict, Any, FrozenSet, Tuple
+
+import numpy as np
+
+from .diagnostics import diagnostics
+
+
+def _select(test, body, orelse):
+    """
+    a if test else b: для скаляра - как в Python, для массива - np.where
+    
+    Ветвь, не выбранная ни для одного элемента, не вычисляется.
+    """
+    if np.ndim(test) == 0:
+        return body() if test else orelse()
+    if not np.any(test):
+        return np.where(test, 0.0, orelse())
+    if np.all(test):
+        return np.where(test, body(), 0.0)
+    return np.where(test, body(), orelse())
+
+
+def _and(left, right):
+    """a and b: для массивов - поэлементно, значение операнда, как в Python"""
+    if np.ndim(left) == 0:
+        return left and right()
+    if not np.any(left):
+        return left
+    return np.where(left, right(), left)
+
+
+def _or(left, right):
+    """a or b: для массивов - поэлементно, значение операнда, как в Python"""
+    if np.ndim(left) == 0:
+        return left or right()
+    if np.all(left):
+        return left
+    return np.where(left, left, right())
+
+
+def _not(value):
+    """not a: для массивов - поэлементно"""
+    if np.ndim(value) == 0:
+        return not value
+    return np.logical_not(value)
+
+
+# Логические операции, которые работают и со скалярами, и с массивами n
+LOGIC_BUILTINS = {'_select': _select, '_and': _and, '_or': _or, '_not': _not}
+
+
+class _ArrayLogic(ast.NodeTransformer):
+    """
+    Условия и логические операции через LOGIC_BUILTINS
+    
+    Для массива n "a if n > 2 else b" и "0 < n < 5" требуют истинности
+    массива. Вычисляемые лениво ветви оборачиваются в lambda: для
+    скаляров порядок вычисления остаётся как в Python.
+    """
+    
+    @staticmethod
+    def _call(name: str, *args: ast.expr) -> ast.expr:
+        return ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=list(args), keywords=[])
+    
+    @staticmethod
+    def _lazy(node: ast.expr) -> ast.expr:
+        arguments = ast.arguments(posonlyargs=[], args=[], kwonlyargs=[], kw_defaults=[], defaults=[])
+        return ast.Lambda(args=arguments, body=node)
+    
+    def visit_IfExp(self, node: ast.IfExp) -> ast.expr:
+        self.generic_visit(node)
+        return self._call('_select', node.test, self._lazy(node.body), self._lazy(node.orelse))
+    
+    def visit_BoolOp(self, node: ast.BoolOp) -> ast.expr:
+        self.generic_visit(node)
+        name = '_and' if isinstance(node.op, ast.And) else '_or'
+        return reduce(lambda left, right: self._call(name, left, self._lazy(right)), node.values)
+    
+    def visit_UnaryOp(self, node: ast.UnaryOp) -> ast.expr:
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return self._call('_not', node.operand)
+        return node
+    
+    def visit_Compare(self, node: ast.Compare) -> ast.expr:
+        self.generic_visit(node)
+        if len(node.ops) == 1:
+            return node
+        
+        # 0 < n < 5 -> (0 < n) and (n < 5)
+        operands = [node.left] + node.comparators
+        pairs = [ast.Compare(left=left, ops=[op], comparators=[right])
+                 for left, op, right in zip(operands, node.ops, operands[1:])]
+        return reduce(lambda left, right: self._call('_and', left, self._lazy(right)), pairs)
+
+
+def code_names(code) -> FrozenSet[str]:
+    """Глобальные имена кода, включая вложенные lambda"""
+    names = frozenset(code.co_names)
+    for const in code.co_consts:
+        if hasattr(const, 'co_names'):
+            names |= code_names(const)
+    return names
 
 
 class ExpressionParser:
     """Безопасный парсер математических выражений"""
     
+    # Максимальное число скомпилированных выражений в кэше
+    CACHE_SIZE = 512
+    
     def __init__(self):
         self._setup_builtins()
+        self._setup_array_builtins()
+        
+        # LRU-кэш: строка выражения -> (код, имена переменных вне builtins)
+        self._code_cache: "OrderedDict[str, Tuple[Any, FrozenSet[str]]]" = OrderedDict()
+        
+        # Заранее собранное пространство имён для eval,
+        # в кадре перезаписываются только переменные контекста
+        self._namespace = {'__builtins__': {}, **self.builtins}
+        self._array_namespace = {'__builtins__': {}, **self.array_builtins}
     
     def _setup_builtins(self):
         """Настройка встроенных математических функций"""
@@ -42,7 +159,7 @@ class ExpressionParser:
             'ceil': math.ceil,
             'round': round,
             'trunc': math.trunc,
-
+            
             'max': max,
             'min': min,
             
@@ -50,12 +167,82 @@ class ExpressionParser:
             'degrees': math.degrees,
             'radians': math.radians,
             'hypot': math.hypot,
-
+            
             'triangle': self._triangle_oscillator,
-
             
+            **LOGIC_BUILTINS,
         }
     
+    def _setup_array_builtins(self):
+        """Поэлементные NumPy-аналоги встроенных функций"""
+        self.array_builtins = {
+            # Константы
+            'pi': np.pi,
+            'e': np.e,
+            'tau': 2 * np.pi,
+            
+            # Тригонометрические функции
+            'sin': np.sin,
+            'cos': np.cos,
+            'tan': np.tan,
+            'asin': np.arcsin,
+            'acos': np.arccos,
+            'atan': np.arctan,
+            'atan2': np.arctan2,
+            
+            # Степени и корни
+            'pow': np.power,
+            'sqrt': np.sqrt,
+            'exp': np.exp,
+            'log': self._log_array,
+            'log10': np.log10,
+            'log2': np.log2,
+            
+            # Округление и модуль
+            'abs': np.abs,
+            'floor': np.floor,
+            'ceil': np.ceil,
+            'round': np.round,
+            'trunc': np.trunc,
+            
+            'max': self._max_array,
+            'min': self._min_array,
+            
+            # Другие
+            'degrees': np.degrees,
+            'radians': np.radians,
+            'hypot': np.hypot,
+            
+            'triangle': self._triangle_oscillator_array,
+            
+            **LOGIC_BUILTINS,
+        }
+    
+    def compile_expression(self, expression: str) -> Tuple[Any, FrozenSet[str]]:
+        """
+        Компилирует выражение с кэшированием
+        
+        Returns:
+            Кортеж (код, имена переменных, которые должен дать контекст)
+        """
+        cached = self._code_cache.get(expression)
+        if cached is not None:
+            self._code_cache.move_to_end(expression)
+            return cached
+        
+        tree = _ArrayLogic().visit(ast.parse(expression.strip(), "<string>", mode='eval'))
+        code = compile(ast.fix_missing_locations(tree), "<string>", "eval")
+        
+        # Имена вне builtins проверяются по контексту при вычислении
+        free_names = code_names(code) - self.builtins.keys()
+        
+        cached = (code, free_names)
+        self._code_cache[expression] = cached
+        if len(self._code_cache) > self.CACHE_SIZE:
+            self._code_cache.popitem(last=False)
+        
+        return cached
+    
     def parse(self, expression: str, context: Dict[str, Any] = None) -> float:
         """
         Парсит и вычисляет математическое выражение
@@ -69,36 +256,106 @@ class ExpressionParser:
                 return float(expression)
             
             # Иначе парсим строку
-            expr = expression.strip()
-            if not expr:
+            if not expression or expression.isspace():
                 return 0.0
             
             # Добавляем angle_step автоматически
             if 'count' in context and context['count'] > 0:
                 context['angle_step'] = 2 * math.pi / context['count']
             
-            # Создаем контекст для eval
-            eval_context = {
-                '__builtins__': {},
-                **self.builtins,
-                **context
-            }
-            
-            # Безопасное вычисление
-            code = compile(expr, "<string>", "eval")
+            code, free_names = self.compile_expression(expression)
             
-            # Проверяем используемые имена
-            for name in code.co_names:
-                if name not in eval_context:
-                    raise ValueError(f"Name '{name}' is not allowed")
+            # Все свободные имена должны прийти из контекста
+            if not context.keys() >= free_names:
+                missing = sorted(free_names - context.keys())
+                raise ValueError(f"Name '{missing[0]}' is not allowed")
             
-            result = eval(code, eval_context)
+            result = self._eval(code, self._namespace, context)
             return float(result)
-            
+        
         except Exception as e:
-            print(f"Error parsing expression '{expression}': {e}")
+            diagnostics.error("ExpressionParser.parse", str(expression),
+                              f"Error parsing expression '{expression}': {e}")
             return 0.0
     
+    def parse_array(self, expression: Any, n: np.ndarray,
+                    context: Dict[str, Any] = None) -> np.ndarray:
+        """
+        Вычисляет выражение сразу для массива значений n
+        
+        Args:
+            expression: строка выражения или число
+            n: массив индексов
+            context: скалярные переменные (time, count, ...)
+        
+        Returns:
+            Массив float64 той же формы, что и n
+        """
+        n = np.asarray(n, dtype=np.float64)
+        context = dict(context) if context else {}
+        context['n'] = n
+        
+        try:
+            if isinstance(expression, (int, float)):
+                return np.full(n.shape, float(expression))
+            
+            if not expression or expression.isspace():
+                return np.zeros(n.shape)
+            
+            if context.get('count', 0) > 0:
+                context['angle_step'] = 2 * math.pi / context['count']
+            
+            compiled = self.compile_expression(expression)
+            return self.evaluate_array(compiled, context, n.shape)
+        
+        except Exception as e:
+            diagnostics.error("ExpressionParser.parse_array", str(expression),
+                              f"Error parsing expression '{expression}': {e}")
+            return np.zeros(n.shape)
+    
+    def evaluate_array(self, compiled: Tuple[Any, FrozenSet[str]],
+                       context: Dict[str, Any], shape: Tuple[int, ...]) -> np.ndarray:
+        """
+        Вычисляет уже скомпилированное выражение над массивами контекста
+        
+        Args:
+            compiled: результат compile_expression
+            context: переменные (массивы формы shape или скаляры)
+            shape: форма результата
+        """
+        code, free_names = compiled
+        
+        if not context.keys() >= free_names:
+            missing = sorted(free_names - context.keys())
+            raise ValueError(f"Name '{missing[0]}' is not allowed")
+        
+        with np.errstate(all='ignore'):
+            result = self._eval(code, self._array_namespace, context)
+        
+        result = np.broadcast_to(np.asarray(result, dtype=np.float64), shape)
+        
+        # Как и в скалярном parse, ошибки вычисления дают 0.0
+        return np.nan_to_num(result, nan=0.0, posinf=0.0, neginf=0.0)
+    
+    @staticmethod
+    def _eval(code, namespace: Dict[str, Any], context: Dict[str, Any]) -> Any:
+        """
+        Вычисление кода в общем пространстве имён парсера
+        
+        Переменные контекста не могут подменить builtins и удаляются
+        после вычисления, чтобы не попасть в следующий вызов.
+        """
+        reserved = context.keys() & namespace.keys()
+        if reserved:
+            raise ValueError(f"Name '{min(reserved)}' is reserved")
+        
+        namespace.update(context)
+        try:
+            return eval(code, namespace)
+        finally:
+            for name in context:
+                del namespace[name]
+    
     def parse_coordinate(self, coord: Any, context: Dict[str, Any] = None) -> float:
         """
         Парсит координату, которая может быть числом или выражением
@@ -109,7 +366,7 @@ class ExpressionParser:
             return self.parse(coord, context)
         else:
             return 0.0
-
+    
     def _triangle_oscillator(self, x: float, period: float = 2*math.pi) -> float:
         """
         Треугольная волна
@@ -117,7 +374,7 @@ class ExpressionParser:
         Args:
             x: входное значение
             period: период волны
-            
+        
         Returns:
             Значение от -1 до 1
         """
@@ -127,4 +384,31 @@ class ExpressionParser:
         if t < 0.5:
             return 4 * t - 1  # от -1 до 1
         else:
-            return 3 - 4 * t  # от 1 до -1
\ No newline at end of file
+            return 3 - 4 * t  # от 1 до -1
+    
+    def _triangle_oscillator_array(self, x, period=2*math.pi):
+        """Треугольная волна для массивов (см. _triangle_oscillator)"""
+        x = np.asarray(x, dtype=np.float64)
+        period = np.asarray(period, dtype=np.float64)
+        
+        with np.errstate(all='ignore'):
+            t = np.mod(x, period) / period
+        wave = np.where(t < 0.5, 4 * t - 1, 3 - 4 * t)
+        return np.where(period == 0, 0.0, wave)
+    
+    @staticmethod
+    def _log_array(x, base=None):
+        """Логарифм с необязательным основанием, как math.log"""
+        if base is None:
+            return np.log(x)
+        return np.log(x) / np.log(base)
+    
+    @staticmethod
+    def _max_array(*args):
+        """Поэлементный max по всем аргументам"""
+        return reduce(np.maximum, args)
+    
+    @staticmethod
+    def _min_array(*args):
+        """Поэлементный min по всем аргументам"""
+        return reduce(np.minimum, args)
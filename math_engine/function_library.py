@@ -2,6 +2,9 @@
 Реестр математических функций
 """
 from typing import Dict, Any, List
+
+import numpy as np
+
 from .functions import (
     IFunction,
     CircleFunction,
@@ -51,4 +54,25 @@ class FunctionLibrary:
     
     def evaluate(self, function_id: str, params: Dict[str, Any], context: Dict[str, Any] = None) -> List[float]:
         func = self.get(function_id)
-        return func.evaluate(params, context)
\ No newline at end of file
+        
+        # Массивы в параметрах - пакетное вычисление
+        for value in params.values():
+            if isinstance(value, np.ndarray):
+                return func.evaluate_batch(params, context)
+        
+        return func.evaluate(params, context)
+    
+    def evaluate_batch(self, function_id: str, params: Dict[str, Any],
+                       context: Dict[str, Any]) -> np.ndarray:
+        """
+        Вычисление функции сразу для массива индексов
+        
+        Args:
+            params: параметры - массивы длины len(context['n']) или скаляры
+            context: контекст, где 'n' - массив индексов
+            
+        Returns:
+            Массив координат формы (len(n), 2)
+        """
+        func = self.get(function_id)
+        return func.evaluate_batch(params, context)
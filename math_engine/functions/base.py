@@ -2,16 +2,90 @@
 Базовый интерфейс функции
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
 
 
 class IFunction(ABC):
     """Интерфейс математической функции"""
     
+    # Переменные, которые функция добавляет в контекст своих параметров
+    context_names: Tuple[str, ...] = ()
+    
     @abstractmethod
     def evaluate(self, params: Dict[str, Any], context: Dict[str, Any] = None) -> List[float]:
         pass
     
+    def evaluate_batch(self, params: Dict[str, Any], context: Dict[str, Any] = None) -> np.ndarray:
+        """
+        Вычисление сразу для массива точек
+        
+        Параметры и контекст могут содержать массивы одной длины
+        (в контексте 'n' - массив индексов) или скаляры.
+        По умолчанию вызывает evaluate для каждого элемента,
+        функции с массивной реализацией переопределяют метод.
+        
+        Returns:
+            Массив координат формы (size, 2)
+        """
+        size = self.batch_size(params, context)
+        context = context or {}
+        result = np.empty((size, 2))
+        
+        for i in range(size):
+            item_params = {
+                key: value[i] if isinstance(value, np.ndarray) else value
+                for key, value in params.items()
+            }
+            item_context = {
+                key: value[i] if isinstance(value, np.ndarray) else value
+                for key, value in context.items()
+            }
+            coords = self.evaluate(item_params, item_context)
+            result[i] = coords[:2]
+        
+        return result
+    
+    def compile(self, config: Dict[str, Any], compiler) -> Any:
+        """
+        Компиляция конфигурации точки в узел дерева вычисления
+        
+        Вызывается один раз при загрузке сцены. Композитные функции
+        переопределяют метод, чтобы скомпилировать вложенные точки.
+        """
+        return compiler.build(self, config)
+    
+    def evaluate_compiled(self, node, context: Dict[str, Any]) -> np.ndarray:
+        """
+        Вычисление скомпилированного узла для всех n из контекста
+        
+        Returns:
+            Массив координат формы (len(context['n']), 2)
+        """
+        params = {key: param.evaluate(context) for key, param in node.params.items()}
+        return self.evaluate_batch(params, context)
+    
+    @staticmethod
+    def batch_size(params: Dict[str, Any], context: Dict[str, Any] = None) -> int:
+        """Размер пакета по массиву n из контекста или по массивам параметров"""
+        if context and isinstance(context.get('n'), np.ndarray):
+            return len(context['n'])
+        
+        for value in params.values():
+            if isinstance(value, np.ndarray):
+                return len(value)
+        
+        return 1
+    
+    @staticmethod
+    def stack_coords(x: Any, y: Any, size: int) -> np.ndarray:
+        """Сборка массива (size, 2) из массивов или скаляров x и y"""
+        result = np.empty((size, 2))
+        result[:, 0] = x
+        result[:, 1] = y
+        return result
+    
     @property
     @abstractmethod
     def function_id(self) -> str:
@@ -20,4 +94,4 @@ class IFunction(ABC):
     @property
     @abstractmethod
     def required_params(self) -> List[str]:
-        pass
\ No newline at end of file
+        pass
@@ -3,6 +3,9 @@
 """
 import math
 from typing import Dict, Any, List
+
+import numpy as np
+
 from .base import IFunction
 
 
@@ -27,4 +30,14 @@ class CircleFunction(IFunction):
         x = size * math.cos(angle)
         y = size * math.sin(angle)
         
-        return [x, y]
\ No newline at end of file
+        return [x, y]
+    
+    def evaluate_batch(self, params: Dict[str, Any], context: Dict[str, Any] = None) -> np.ndarray:
+        size = self.batch_size(params, context)
+        angle = np.asarray(params.get("angle", 0.0), dtype=np.float64)
+        size_param = np.asarray(params.get("size", 1.0), dtype=np.float64)
+        rotation = np.asarray(params.get("rotation", 0.0), dtype=np.float64)
+        
+        angle = angle + rotation
+        
+        return self.stack_coords(size_param * np.cos(angle), size_param * np.sin(angle), size)
@@ -3,12 +3,18 @@
 """
 import math
 from typing import Dict, Any, List
+
+import numpy as np
+
 from .base import IFunction
+from ..diagnostics import diagnostics, source_key
 
 
 class DirectedLineFunction(IFunction):
     """Точка на линии между двумя функциями с расстоянием от начала"""
     
+    context_names = ('current_length', 'from_x', 'from_y', 'to_x', 'to_y')
+    
     def __init__(self, function_library=None, expression_parser=None):
         self.function_library = function_library
         self.expression_parser = expression_parser
@@ -121,9 +127,69 @@ class DirectedLineFunction(IFunction):
             return [point_x, point_y]
             
         except Exception as e:
-            print(f"Error in directed_line function: {e}")
+            diagnostics.error("directed_line", source_key(params), f"Error in directed_line function: {e}")
             return [0, 0]
     
+    def compile(self, config: Dict[str, Any], compiler) -> Any:
+        from_config = config.get("from", {})
+        to_config = config.get("to", {})
+        children = [
+            compiler.compile_point(from_config if isinstance(from_config, dict) else {}),
+            compiler.compile_point(to_config if isinstance(to_config, dict) else {}),
+        ]
+        
+        node = compiler.build(self, config, children, skip=("from", "to"))
+        for key in ("distance", "offset", "rotation"):
+            if key not in node.params:
+                node.params[key] = compiler.compile_param(0.0)
+        
+        return node
+    
+    def evaluate_compiled(self, node, context: Dict[str, Any]) -> np.ndarray:
+        from_point = node.children[0].evaluate(context)
+        to_point = node.children[1].evaluate(context)
+        
+        x1, y1 = from_point[:, 0], from_point[:, 1]
+        x2, y2 = to_point[:, 0], to_point[:, 1]
+        
+        dx = x2 - x1
+        dy = y2 - y1
+        current_length = np.hypot(dx, dy)
+        
+        # Контекст с current_length для выражений distance/offset/rotation
+        eval_context = {
+            **context,
+            'current_length': current_length,
+            'from_x': x1,
+            'from_y': y1,
+            'to_x': x2,
+            'to_y': y2,
+        }
+        
+        distance = node.params["distance"].evaluate(eval_context)
+        offset = node.params["offset"].evaluate(eval_context)
+        rotation = node.params["rotation"].evaluate(eval_context)
+        
+        # Совпадающие точки дают начальную точку
+        degenerate = current_length < 0.000001
+        safe_length = np.where(degenerate, 1.0, current_length)
+        dir_x = dx / safe_length
+        dir_y = dy / safe_length
+        
+        # Поворот направления
+        cos_r = np.cos(rotation)
+        sin_r = np.sin(rotation)
+        dir_x, dir_y = dir_x * cos_r - dir_y * sin_r, dir_x * sin_r + dir_y * cos_r
+        
+        # Точка на линии и перпендикулярное смещение
+        point_x = x1 + dir_x * distance - dir_y * offset
+        point_y = y1 + dir_y * distance + dir_x * offset
+        
+        result = np.empty((len(context['n']), 2))
+        result[:, 0] = np.where(degenerate, x1, point_x)
+        result[:, 1] = np.where(degenerate, y1, point_y)
+        return result
+    
     def _parse_config_with_context(self, config: Dict[str, Any], 
                                   context: Dict[str, Any]) -> Dict[str, Any]:
         """Парсит конфигурацию функции с использованием expression_parser и контекста"""
@@ -142,7 +208,7 @@ class DirectedLineFunction(IFunction):
                     parsed_value = self.expression_parser.parse(value, context or {})
                     parsed_config[key] = parsed_value
                 except Exception as e:
-                    print(f"Error parsing {key}='{value}': {e}")
+                    diagnostics.error(f"directed_line.{key}", value, f"Error parsing {key}='{value}': {e}")
                     parsed_config[key] = 0.0
         
         return parsed_config
\ No newline at end of file
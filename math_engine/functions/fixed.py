@@ -2,6 +2,9 @@
 Фиксированная точка
 """
 from typing import Dict, Any, List
+
+import numpy as np
+
 from .base import IFunction
 
 
@@ -19,4 +22,10 @@ class FixedFunction(IFunction):
     def evaluate(self, params: Dict[str, Any], context: Dict[str, Any] = None) -> List[float]:
         x = float(params.get("x", 0.0))
         y = float(params.get("y", 0.0))
-        return [x, y]
\ No newline at end of file
+        return [x, y]
+    
+    def evaluate_batch(self, params: Dict[str, Any], context: Dict[str, Any] = None) -> np.ndarray:
+        size = self.batch_size(params, context)
+        x = np.asarray(params.get("x", 0.0), dtype=np.float64)
+        y = np.asarray(params.get("y", 0.0), dtype=np.float64)
+        return self.stack_coords(x, y, size)
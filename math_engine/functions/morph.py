@@ -3,7 +3,11 @@
 """
 import math
 from typing import Dict, Any, List
+
+import numpy as np
+
 from .base import IFunction
+from ..diagnostics import diagnostics, source_key
 
 
 class MorphFunction(IFunction):
@@ -57,7 +61,7 @@ class MorphFunction(IFunction):
                 coords = func.evaluate(parsed_config, context)
                 all_coords.append(coords[:2])  # Берем только x, y
             except Exception as e:
-                print(f"Error in morph function: {e}")
+                diagnostics.error("morph", source_key(func_config), f"Error in morph function: {e}")
                 all_coords.append([0.0, 0.0])
         
         if len(all_coords) < 2:
@@ -81,6 +85,44 @@ class MorphFunction(IFunction):
         
         return [x, y]
     
+    def compile(self, config: Dict[str, Any], compiler) -> Any:
+        children = compiler.compile_children(config.get("functions", []))
+        return compiler.build(self, config, children, skip=("functions",))
+    
+    def evaluate_compiled(self, node, context: Dict[str, Any]) -> np.ndarray:
+        size = len(context['n'])
+        
+        if not node.children:
+            return np.zeros((size, 2))
+        
+        t_param = node.params.get("t")
+        t = t_param.evaluate(context) if t_param is not None else 0.0
+        t = np.clip(np.asarray(t, dtype=np.float64), 0.0, 1.0)
+        
+        if len(node.children) == 1:
+            return node.children[0].evaluate(context)
+        
+        # Вычисляем все функции: форма (функций, size, 2)
+        all_coords = np.empty((len(node.children), size, 2))
+        for i, child in enumerate(node.children):
+            try:
+                all_coords[i] = child.evaluate(context)
+            except Exception as e:
+                diagnostics.error("morph", child.key, f"Error in morph function: {e}")
+                all_coords[i] = 0.0
+        
+        # Интерполируем между соседними функциями
+        last = len(node.children) - 1
+        segment = np.broadcast_to(t * last, (size,))
+        index = np.minimum(np.floor(segment).astype(np.intp), last - 1)
+        fraction = (segment - index)[:, None]
+        
+        rows = np.arange(size)
+        start = all_coords[index, rows]
+        end = all_coords[index + 1, rows]
+        
+        return start + fraction * (end - start)
+    
     def _parse_config_with_context(self, config: Dict[str, Any], 
                                   context: Dict[str, Any]) -> Dict[str, Any]:
         """Парсит параметры с использованием expression_parser и контекста"""
@@ -99,7 +141,7 @@ class MorphFunction(IFunction):
                     parsed_value = self.expression_parser.parse(value, context or {})
                     parsed_config[key] = parsed_value
                 except Exception as e:
-                    print(f"Error parsing {key}='{value}': {e}")
+                    diagnostics.error(f"morph.{key}", value, f"Error parsing {key}='{value}': {e}")
                     parsed_config[key] = 0.0
         
         return parsed_config
\ No newline at end of file
@@ -3,7 +3,11 @@
 """
 import math
 from typing import Dict, Any, List
+
+import numpy as np
+
 from .base import IFunction
+from ..diagnostics import diagnostics, source_key
 
 
 class MultiplyFunction(IFunction):
@@ -61,7 +65,37 @@ class MultiplyFunction(IFunction):
                         result[1] *= coords[1]
                         
             except Exception as e:
-                print(f"Error in multiply function: {e}")
+                diagnostics.error("multiply", source_key(func_config), f"Error in multiply function: {e}")
+        
+        return result
+    
+    def compile(self, config: Dict[str, Any], compiler) -> Any:
+        children = compiler.compile_children(config.get("functions", []))
+        options = {"operation": config.get("operation", "elementwise")}
+        return compiler.build(self, config, children,
+                              skip=("functions", "operation"), options=options)
+    
+    def evaluate_compiled(self, node, context: Dict[str, Any]) -> np.ndarray:
+        if not node.children:
+            return np.zeros((len(context['n']), 2))
+        
+        operation = node.options["operation"]
+        result = node.children[0].evaluate(context).copy()
+        
+        # Последовательно умножаем на остальные функции
+        for child in node.children[1:]:
+            try:
+                coords = child.evaluate(context)
+                
+                if operation == "elementwise":
+                    result *= coords
+                elif operation == "scalar_x":
+                    result[:, 0] *= coords[:, 0]
+                elif operation == "scalar_y":
+                    result[:, 1] *= coords[:, 1]
+                    
+            except Exception as e:
+                diagnostics.error("multiply", child.key, f"Error in multiply function: {e}")
         
         return result
     
@@ -83,7 +117,7 @@ class MultiplyFunction(IFunction):
                     parsed_value = self.expression_parser.parse(value, context or {})
                     parsed_config[key] = parsed_value
                 except Exception as e:
-                    print(f"Error parsing {key}='{value}': {e}")
+                    diagnostics.error(f"multiply.{key}", value, f"Error parsing {key}='{value}': {e}")
                     parsed_config[key] = 0.0
         
         return parsed_config
\ No newline at end of file
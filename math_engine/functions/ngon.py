@@ -2,10 +2,37 @@
 Функция N-угольника
 """
 import math
-from typing import Dict, Any, List
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+
 from .base import IFunction
 
 
+# Больше сторон - считаем вершины напрямую, без таблицы
+MAX_TABLE_SIDES = 4096
+
+
+@lru_cache(maxsize=64)
+def unit_polygon(sides: int) -> Tuple[np.ndarray, Tuple[Tuple[float, float], ...]]:
+    """
+    Вершины правильного многоугольника радиуса 1
+    
+    Returns:
+        (массив формы (sides + 1, 2), те же вершины кортежами);
+        последняя вершина повторяет первую
+    """
+    side_angle = 2 * math.pi / sides
+    angles = np.arange(sides + 1) * side_angle + side_angle/2
+    
+    table = np.column_stack((np.cos(angles), np.sin(angles)))
+    table[-1] = table[0]
+    table.flags.writeable = False
+    
+    return table, tuple(map(tuple, table.tolist()))
+
+
 class NGonFunction(IFunction):
     """Функция N-угольника"""
     
@@ -49,19 +76,68 @@ class NGonFunction(IFunction):
         side_index = int(adjusted_angle / side_angle) % sides_int
         t = (adjusted_angle % side_angle) / side_angle
         
-        vertices = []
-        for i in range(sides_int):
-            vertex_angle = i * side_angle + side_angle/2
-            x = size * math.cos(vertex_angle)
-            y = size * math.sin(vertex_angle)
-            vertices.append((x, y))
+        if sides_int > MAX_TABLE_SIDES:
+            vertex_angle = side_index * side_angle + side_angle/2
+            x1, y1 = math.cos(vertex_angle), math.sin(vertex_angle)
+            x2, y2 = math.cos(vertex_angle + side_angle), math.sin(vertex_angle + side_angle)
+        else:
+            vertices = unit_polygon(sides_int)[1]
+            x1, y1 = vertices[side_index]
+            x2, y2 = vertices[side_index + 1]
+        
+        x = size * (x1 + t * (x2 - x1))
+        y = size * (y1 + t * (y2 - y1))
         
-        vertices.append(vertices[0])
+        return [x, y]
+    
+    def evaluate_batch(self, params: Dict[str, Any], context: Dict[str, Any] = None) -> np.ndarray:
+        size = self.batch_size(params, context)
+        angle = np.asarray(params.get("angle", 0.0), dtype=np.float64)
+        size_param = np.asarray(params.get("size", 1.0), dtype=np.float64)
+        sides = np.asarray(params.get("sides", 5.0), dtype=np.float64)
+        rotation = np.asarray(params.get("rotation", 0.0), dtype=np.float64)
         
-        x1, y1 = vertices[side_index]
-        x2, y2 = vertices[side_index + 1]
+        angle = angle + rotation
+        sides = np.maximum(sides, 3)
+        
+        sides_int = np.floor(sides)
+        sides_frac = sides - sides_int
+        
+        x, y = self._points_on_ngon_batch(angle, size_param, sides_int)
+        
+        # Дробное число сторон - смешиваем с (sides_int + 1)-угольником
+        blend = np.where(sides_frac < 0.001, 0.0, sides_frac)
+        if np.any(blend):
+            x2, y2 = self._points_on_ngon_batch(angle, size_param, sides_int + 1)
+            x = x + blend * (x2 - x)
+            y = y + blend * (y2 - y)
+        
+        return self.stack_coords(x, y, size)
+    
+    def _points_on_ngon_batch(self, angle: np.ndarray, size: np.ndarray, sides_int: np.ndarray):
+        side_angle = 2 * math.pi / sides_int
+        
+        adjusted_angle = np.mod(angle - side_angle/2, 2 * math.pi)
+        side_index = np.mod(np.floor(adjusted_angle / side_angle), sides_int)
+        t = np.mod(adjusted_angle, side_angle) / side_angle
+        
+        # Одинаковое число сторон - вершины берутся из таблицы по индексу
+        sides_value = sides_int.flat[0]
+        if sides_value <= MAX_TABLE_SIDES and (sides_int.ndim == 0 or np.all(sides_int == sides_value)):
+            table = unit_polygon(int(sides_value))[0]
+            index = side_index.astype(np.intp)
+            vertex1 = table[index]
+            vertex2 = table[index + 1]
+            x1, y1 = vertex1[..., 0], vertex1[..., 1]
+            x2, y2 = vertex2[..., 0], vertex2[..., 1]
+        else:
+            # Углы концов стороны; вершина sides_int совпадает с вершиной 0
+            angle1 = side_index * side_angle + side_angle/2
+            angle2 = angle1 + side_angle
+            x1, y1 = np.cos(angle1), np.sin(angle1)
+            x2, y2 = np.cos(angle2), np.sin(angle2)
         
-        x = x1 + t * (x2 - x1)
-        y = y1 + t * (y2 - y1)
+        x = size * (x1 + t * (x2 - x1))
+        y = size * (y1 + t * (y2 - y1))
         
-        return [x, y]
\ No newline at end of file
+        return x, y
@@ -3,6 +3,9 @@
 """
 import math
 from typing import Dict, Any, List
+
+import numpy as np
+
 from .base import IFunction
 
 
@@ -43,4 +46,28 @@ class SquareFunction(IFunction):
             x = size
             y = -size + 2 * size * t
         
-        return [x, y]
\ No newline at end of file
+        return [x, y]
+    
+    # Стороны квадрата как x = a + b*t, y = c + d*t (в единицах size)
+    _SIDE_X0 = np.array([1.0, -1.0, -1.0, 1.0])
+    _SIDE_DX = np.array([-2.0, 0.0, 2.0, 0.0])
+    _SIDE_Y0 = np.array([1.0, 1.0, -1.0, -1.0])
+    _SIDE_DY = np.array([0.0, -2.0, 0.0, 2.0])
+    
+    def evaluate_batch(self, params: Dict[str, Any], context: Dict[str, Any] = None) -> np.ndarray:
+        size = self.batch_size(params, context)
+        angle = np.asarray(params.get("angle", 0.0), dtype=np.float64)
+        size_param = np.asarray(params.get("size", 1.0), dtype=np.float64)
+        rotation = np.asarray(params.get("rotation", 0.0), dtype=np.float64)
+        
+        angle = np.mod(angle + rotation - math.pi/4, 2 * math.pi)
+        half_pi = math.pi / 2
+        
+        # Выбор стороны через таблицы вместо ветвлений
+        side = np.floor(angle / half_pi).astype(np.intp) % 4
+        t = np.mod(angle, half_pi) / half_pi
+        
+        x = size_param * (self._SIDE_X0[side] + self._SIDE_DX[side] * t)
+        y = size_param * (self._SIDE_Y0[side] + self._SIDE_DY[side] * t)
+        
+        return self.stack_coords(x, y, size)
@@ -2,7 +2,11 @@
 Сумма нескольких функций
 """
 from typing import Dict, Any, List
+
+import numpy as np
+
 from .base import IFunction
+from ..diagnostics import diagnostics, source_key
 
 
 class SumFunction(IFunction):
@@ -44,10 +48,25 @@ class SumFunction(IFunction):
                     total_y += coords[1]
                     
             except Exception as e:
-                print(f"Error in sum function: {e}")
+                diagnostics.error("sum", source_key(func_config), f"Error in sum function: {e}")
         
         return [total_x, total_y]
     
+    def compile(self, config: Dict[str, Any], compiler) -> Any:
+        children = compiler.compile_children(config.get("functions", []))
+        return compiler.build(self, config, children, skip=("functions",))
+    
+    def evaluate_compiled(self, node, context: Dict[str, Any]) -> np.ndarray:
+        total = np.zeros((len(context['n']), 2))
+        
+        for child in node.children:
+            try:
+                total += child.evaluate(context)
+            except Exception as e:
+                diagnostics.error("sum", child.key, f"Error in sum function: {e}")
+        
+        return total
+    
     def _parse_config_with_context(self, config: Dict[str, Any], 
                                   context: Dict[str, Any]) -> Dict[str, Any]:
         """Парсит параметры с использованием expression_parser и контекста"""
@@ -79,7 +98,7 @@ class SumFunction(IFunction):
                     parsed_value = self.expression_parser.parse(value, context or {})
                     parsed_config[key] = parsed_value
                 except Exception as e:
-                    print(f"Error parsing {key}='{value}': {e}")
+                    diagnostics.error(f"sum.{key}", value, f"Error parsing {key}='{value}': {e}")
                     parsed_config[key] = 0.0
         
         return parsed_config
\ No newline at end of file
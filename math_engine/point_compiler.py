@@ -0,0 +1,324 @@
+"""
+Компиляция конфигураций точек в деревья вычисления
+
+Конфигурация точки (включая вложенные functions, from, to) один раз
+при загрузке превращается в дерево CompiledPoint: выражения уже
+скомпилированы, функции уже найдены в библиотеке. В кадре остаётся
+только вычисление - без копий словарей и поиска по имени.
+"""
+import ast
+from typing import Dict, Any, List, Optional, Sequence, FrozenSet, Tuple
+
+import numpy as np
+
+from .diagnostics import diagnostics
+
+
+# Переменные, постоянные в пределах сцены
+SCENE_NAMES = frozenset(('count', 'angle_step'))
+
+# Переменные контекста кадра
+FRAME_NAMES = frozenset(('n', 'time')) | SCENE_NAMES
+
+# Префикс имён вынесенных подвыражений
+HOIST_PREFIX = '_hoisted_'
+
+
+class CompiledParam:
+    """
+    Параметр точки: константа или скомпилированное выражение
+    
+    Выражение классифицируется по свободным переменным:
+    CONSTANT - вычислено при загрузке,
+    SCENE - зависит только от count/angle_step: скаляр на сцену,
+    INDEX - зависит от n: массив кэшируется между кадрами,
+    TIME - зависит от time: скаляр, вычисляется раз в кадр,
+    DYNAMIC - зависит от n и time (или от переменных функции).
+    У DYNAMIC-выражения подвыражения других классов вынесены
+    в hoisted и подставляются в контекст по имени.
+    Выражение, которое не удалось скомпилировать (синтаксис, неизвестное
+    имя), помечается broken при загрузке и даёт 0.0. Ошибка вычисления
+    в кадре (деление на ноль при time = 0) даёт 0.0 только в этом кадре.
+    """
+    
+    CONSTANT = 'constant'
+    SCENE = 'scene'
+    INDEX = 'index'
+    TIME = 'time'
+    DYNAMIC = 'dynamic'
+    
+    __slots__ = ('source', 'value', 'compiled', 'parser', 'kind', 'hoisted', 'broken',
+                 '_cache_key', '_cache_value')
+    
+    def __init__(self, source: Any, value: Any = None, compiled=None, parser=None,
+                 hoisted: Sequence[Tuple[str, 'CompiledParam']] = (), broken: bool = False):
+        self.source = source
+        self.value = value
+        self.compiled = compiled
+        self.parser = parser
+        self.hoisted = list(hoisted)
+        self.broken = broken
+        self.kind = self.CONSTANT if compiled is None else self.classify(compiled[1])
+        self._cache_key = None
+        self._cache_value = None
+    
+    @staticmethod
+    def classify(free_names: FrozenSet[str]) -> str:
+        """Класс выражения по множеству свободных переменных"""
+        names = free_names - SCENE_NAMES
+        
+        if not names:
+            return CompiledParam.SCENE if free_names else CompiledParam.CONSTANT
+        if names == {'n'}:
+            return CompiledParam.INDEX
+        if names == {'time'}:
+            return CompiledParam.TIME
+        return CompiledParam.DYNAMIC
+    
+    @property
+    def is_constant(self) -> bool:
+        return self.compiled is None
+    
+    def rebind(self, parser) -> 'CompiledParam':
+        """Копия параметра для другого парсера, без кэшей значений"""
+        return CompiledParam(self.source, value=self.value, compiled=self.compiled,
+                             parser=parser if self.compiled is not None else None,
+                             hoisted=[(name, param.rebind(parser)) for name, param in self.hoisted],
+                             broken=self.broken)
+    
+    def evaluate(self, context: Dict[str, Any]) -> Any:
+        """Значение для контекста кадра: скаляр или массив по n"""
+        if self.kind == self.CONSTANT:
+            return self.value
+        
+        try:
+            return self._evaluate(context)
+        except Exception as e:
+            # Выражение остаётся: в следующем кадре ошибки может не быть
+            diagnostics.error("CompiledParam", str(self.source),
+                              f"Error evaluating expression '{self.source}': {e} (using 0)")
+            return 0.0
+    
+    def _evaluate(self, context: Dict[str, Any]) -> Any:
+        kind = self.kind
+        
+        if kind == self.DYNAMIC:
+            if self.hoisted:
+                context = dict(context)
+                for name, param in self.hoisted:
+                    context[name] = param.evaluate(context)
+            return self.parser.evaluate_array(self.compiled, context, context['n'].shape)
+        
+        if kind == self.INDEX:
+            # Ключ - сам массив n: паттерн держит его, пока не сменится count
+            n = context['n']
+            key = self._cache_key
+            if key is None or key[0] is not n or key[1] != context.get('count'):
+                value = self.parser.evaluate_array(self.compiled, context, n.shape)
+                value.flags.writeable = False
+                self._cache_key = (n, context.get('count'))
+                self._cache_value = value
+            return self._cache_value
+        
+        # SCENE и TIME: одно скалярное значение на сцену/кадр
+        key = context.get('count') if kind == self.SCENE else (context['time'], context.get('count'))
+        if self._cache_value is None or key != self._cache_key:
+            self._cache_value = float(self.parser.evaluate_array(self.compiled, context, ()))
+            self._cache_key = key
+        return self._cache_value
+
+
+class _ExpressionHoister(ast.NodeTransformer):
+    """Вынос подвыражений, не зависящих одновременно от n и time"""
+    
+    # Узлы, которые нет смысла выносить
+    TRIVIAL = (ast.Name, ast.Constant, ast.Starred, ast.Slice)
+    
+    def __init__(self, builtin_names):
+        self.builtin_names = builtin_names
+        self.dependencies: Dict[int, FrozenSet[str]] = {}
+        self.hoisted: List[Tuple[str, str]] = []
+    
+    def collect(self, node: ast.AST) -> FrozenSet[str]:
+        """Свободные переменные каждого узла (кроме имён builtins)"""
+        if isinstance(node, ast.Name):
+            names = frozenset() if node.id in self.builtin_names else frozenset((node.id,))
+        else:
+            names = frozenset()
+            for child in ast.iter_child_nodes(node):
+                names |= self.collect(child)
+        
+        self.dependencies[id(node)] = names
+        return names
+    
+    def visit(self, node: ast.AST) -> ast.AST:
+        if isinstance(node, ast.expr) and not isinstance(node, self.TRIVIAL):
+            kind = CompiledParam.classify(self.dependencies[id(node)])
+            if kind != CompiledParam.DYNAMIC:
+                name = f"{HOIST_PREFIX}{len(self.hoisted)}"
+                self.hoisted.append((name, ast.unparse(node)))
+                return ast.copy_location(ast.Name(id=name, ctx=ast.Load()), node)
+        
+        # Ветви условий вычисляются лениво: вынесенные, они считались бы
+        # в каждом кадре (1/time в невыбранной ветви при time = 0)
+        if isinstance(node, ast.IfExp):
+            node.test = self.visit(node.test)
+            return node
+        if isinstance(node, ast.BoolOp):
+            node.values[0] = self.visit(node.values[0])
+            return node
+        if isinstance(node, ast.Compare) and len(node.ops) > 1:
+            node.left = self.visit(node.left)
+            node.comparators[0] = self.visit(node.comparators[0])
+            return node
+        
+        return self.generic_visit(node)
+
+
+class CompiledPoint:
+    """Узел дерева вычисления: функция, её параметры и дочерние точки"""
+    
+    __slots__ = ('func', 'params', 'children', 'options')
+    
+    def __init__(self, func, params: Dict[str, CompiledParam],
+                 children: Sequence['CompiledPoint'] = (),
+                 options: Optional[Dict[str, Any]] = None):
+        self.func = func
+        self.params = params
+        self.children = list(children)
+        self.options = options or {}
+    
+    def rebind(self, function_library, parser) -> 'CompiledPoint':
+        """
+        Копия точки для другой библиотеки функций и парсера
+        
+        Исходные выражения не компилируются заново; у копии свои кэши,
+        и она может вычисляться в другом потоке.
+        """
+        return CompiledPoint(function_library.get(self.func.function_id),
+                             {name: param.rebind(parser) for name, param in self.params.items()},
+                             [child.rebind(function_library, parser) for child in self.children],
+                             self.options)
+    
+    def evaluate(self, context: Dict[str, Any]) -> np.ndarray:
+        """
+        Вычисление точки для всех n из контекста
+        
+        Returns:
+            Массив координат формы (len(context['n']), 2)
+        """
+        return self.func.evaluate_compiled(self, context)
+    
+    @property
+    def key(self) -> str:
+        """Каноническая запись точки: функция, исходные параметры, дочерние точки"""
+        params = ", ".join(f"{name}={param.source!r}" for name, param in sorted(self.params.items()))
+        children = "; ".join(child.key for child in self.children)
+        return f"{self.func.function_id}({params}{' | ' + children if children else ''})"
+
+
+class PointCompiler:
+    """Компилятор конфигураций точек"""
+    
+    def __init__(self, function_library, expression_parser):
+        self.function_library = function_library
+        self.expression_parser = expression_parser
+    
+    def compile_point(self, config: Dict[str, Any],
+                      defaults: Optional[Dict[str, Any]] = None) -> CompiledPoint:
+        """
+        Компиляция конфигурации точки
+        
+        Args:
+            config: конфигурация точки из JSON
+            defaults: значения параметров, если их нет в config
+        """
+        if defaults:
+            config = {**defaults, **config}
+        
+        func = self.function_library.get(config.get('func', 'circle'))
+        return func.compile(config, self)
+    
+    def compile_children(self, configs: Any) -> List[CompiledPoint]:
+        """Компиляция списка вложенных точек (functions)"""
+        if not isinstance(configs, list):
+            return []
+        return [self.compile_point(item) for item in configs if isinstance(item, dict)]
+    
+    def build(self, func, config: Dict[str, Any],
+              children: Sequence[CompiledPoint] = (),
+              skip: Sequence[str] = (),
+              options: Optional[Dict[str, Any]] = None) -> CompiledPoint:
+        """
+        Сборка узла: все параметры, кроме func и skip, компилируются
+        
+        Args:
+            skip: ключи, которые функция разобрала сама (functions, from, ...)
+            options: литеральные настройки функции (например, operation)
+        """
+        params = {
+            key: self.compile_param(value, func.context_names)
+            for key, value in config.items()
+            if key != 'func' and key not in skip
+        }
+        return CompiledPoint(func, params, children, options)
+    
+    def compile_param(self, value: Any, context_names: Sequence[str] = ()) -> CompiledParam:
+        """
+        Компиляция значения параметра
+        
+        Args:
+            context_names: переменные, которые функция добавляет в контекст
+        """
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            return CompiledParam(value, value=value)
+        
+        if isinstance(value, (int, float)):
+            return CompiledParam(value, value=float(value))
+        
+        if not value or value.isspace():
+            return CompiledParam(value, value=0.0)
+        
+        try:
+            compiled = self.expression_parser.compile_expression(value)
+        except Exception as e:
+            return self._broken(value, e)
+        
+        # Неизвестное имя - ошибка при загрузке, а не в каждом кадре
+        unknown = compiled[1] - FRAME_NAMES - frozenset(context_names)
+        if unknown:
+            return self._broken(value, f"Name '{sorted(unknown)[0]}' is not allowed")
+        
+        # Выражение без переменных вычисляется один раз при загрузке
+        if not compiled[1]:
+            return CompiledParam(value, value=self.expression_parser.parse(value, {}))
+        
+        if CompiledParam.classify(compiled[1]) == CompiledParam.DYNAMIC:
+            return self._compile_dynamic(value, compiled, context_names)
+        
+        return CompiledParam(value, compiled=compiled, parser=self.expression_parser)
+    
+    @staticmethod
+    def _broken(value: str, error: Any) -> CompiledParam:
+        """Параметр с ошибкой: сообщение один раз, значение 0.0"""
+        diagnostics.error("PointCompiler", value, f"Error parsing expression '{value}': {error}")
+        return CompiledParam(value, value=0.0, broken=True)
+    
+    def _compile_dynamic(self, value: str, compiled, context_names: Sequence[str] = ()) -> CompiledParam:
+        """Выражение от n и time: инвариантные подвыражения выносятся"""
+        hoister = _ExpressionHoister(self.expression_parser.builtins.keys())
+        try:
+            tree = ast.parse(value.strip(), mode='eval')
+            hoister.collect(tree.body)
+            tree.body = hoister.visit(tree.body)
+        except Exception:
+            hoister.hoisted = []
+        
+        if not hoister.hoisted:
+            return CompiledParam(value, compiled=compiled, parser=self.expression_parser)
+        
+        hoisted = [(name, self.compile_param(source, context_names)) for name, source in hoister.hoisted]
+        residual = self.expression_parser.compile_expression(ast.unparse(tree))
+        
+        return CompiledParam(value, compiled=residual, parser=self.expression_parser,
+                             hoisted=hoisted)
@@ -0,0 +1,287 @@
+"""
+Офлайн-рендеринг сцен без окна
+
+Сцена (parametric_lines / lines) вычисляется на отрезке времени,
+каждый кадр растеризуется в NumPy-буфер со сглаженными линиями
+и записывается в PNG-файлы или в сырой поток RGBA.
+"""
+import os
+import sys
+import time as time_module
+import struct
+import zlib
+from typing import Dict, Any, Optional, Tuple, List, BinaryIO
+
+import numpy as np
+
+from config_loader import ConfigLoader
+from math_engine.expression_parser import ExpressionParser
+from patterns.connect_pattern import ConnectPattern
+from parallel_evaluator import ParallelEvaluator
+
+
+class LineRasterizer:
+    """Растеризация сглаженных отрезков в RGBA-изображение"""
+    
+    # Ограничение числа выборок за проход (память на промежуточные массивы)
+    MAX_SAMPLES_PER_CHUNK = 2_000_000
+    
+    def __init__(self, width: int, height: int, background: Tuple[int, int, int] = (0, 0, 0)):
+        self.width = width
+        self.height = height
+        self.background = np.asarray(background, dtype=np.float32) / 255
+        self._accum = np.zeros((3, height * width), dtype=np.float32)
+    
+    def clear(self):
+        """Очистка буфера накопления"""
+        self._accum.fill(0.0)
+    
+    def draw_lines(self, lines: np.ndarray, colors: np.ndarray):
+        """
+        Накопление отрезков в буфере
+        
+        Каждый отрезок разбивается на выборки с шагом не больше пикселя,
+        вклад выборки распределяется на 4 соседних пикселя (билинейно).
+        
+        Args:
+            lines: массив (N, 4) - x1, y1, x2, y2 в экранных координатах
+                   (начало координат внизу слева, как в окне)
+            colors: массив (N, 3) RGB 0..255
+        """
+        if len(lines) == 0:
+            return
+        
+        lines = np.asarray(lines, dtype=np.float32)
+        colors = np.asarray(colors, dtype=np.float32) / 255
+        
+        lengths = np.hypot(lines[:, 2] - lines[:, 0], lines[:, 3] - lines[:, 1])
+        samples = np.ceil(lengths).astype(np.int64) + 1
+        
+        # Разбиваем линии на порции по числу выборок
+        ends = np.cumsum(samples)
+        start = 0
+        while start < len(lines):
+            offset = ends[start - 1] if start > 0 else 0
+            stop = int(np.searchsorted(ends, offset + self.MAX_SAMPLES_PER_CHUNK, side='right'))
+            stop = max(stop, start + 1)
+            self._draw_chunk(lines[start:stop], colors[start:stop],
+                             lengths[start:stop], samples[start:stop])
+            start = stop
+    
+    def _draw_chunk(self, lines: np.ndarray, colors: np.ndarray,
+                    lengths: np.ndarray, samples: np.ndarray):
+        line_index = np.repeat(np.arange(len(lines)), samples)
+        
+        # Параметр t выборки внутри своей линии: 0..1
+        first = np.cumsum(samples) - samples
+        step = np.arange(len(line_index)) - np.repeat(first, samples)
+        t = step / np.maximum(np.repeat(samples, samples) - 1, 1)
+        
+        x1, y1, x2, y2 = lines[line_index].T
+        x = x1 + t * (x2 - x1)
+        # Строки изображения идут сверху вниз
+        y = (self.height - 1) - (y1 + t * (y2 - y1))
+        
+        # Вес выборки - длина линии на выборку (~1 на пиксель)
+        weight = (np.maximum(lengths, 1.0) / samples)[line_index]
+        
+        x0 = np.floor(x)
+        y0 = np.floor(y)
+        fx = x - x0
+        fy = y - y0
+        x0 = x0.astype(np.int64)
+        y0 = y0.astype(np.int64)
+        
+        size = self.width * self.height
+        sample_colors = colors[line_index]
+        
+        for dx, dy, w in ((0, 0, (1 - fx) * (1 - fy)), (1, 0, fx * (1 - fy)),
+                          (0, 1, (1 - fx) * fy), (1, 1, fx * fy)):
+            px = x0 + dx
+            py = y0 + dy
+            inside = (px >= 0) & (px < self.width) & (py >= 0) & (py < self.height)
+            if not np.any(inside):
+                continue
+            
+            pixel = (py * self.width + px)[inside]
+            coverage = (w * weight)[inside]
+            
+            for channel in range(3):
+                self._accum[channel] += np.bincount(
+                    pixel, weights=coverage * sample_colors[inside, channel], minlength=size
+                ).astype(np.float32)
+    
+    def to_rgba(self) -> np.ndarray:
+        """Изображение (height, width, 4) uint8"""
+        rgb = np.clip(self._accum + self.background[:, None], 0.0, 1.0)
+        image = np.empty((self.height, self.width, 4), dtype=np.uint8)
+        image[..., :3] = (rgb.T.reshape(self.height, self.width, 3) * 255 + 0.5).astype(np.uint8)
+        image[..., 3] = 255
+        return image
+
+
+def write_png(path: str, image: np.ndarray):
+    """Запись RGBA-изображения (height, width, 4) uint8 в PNG"""
+    height, width = image.shape[:2]
+    
+    # Каждая строка с байтом фильтра 0
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    raw[:, 1:] = image.reshape(height, width * 4)
+    
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return (struct.pack('>I', len(data)) + tag + data +
+                struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+    
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', header))
+        f.write(chunk(b'IDAT', zlib.compress(raw.tobytes(), 3)))
+        f.write(chunk(b'IEND', b''))
+
+
+class OfflineRenderer:
+    """Рендеринг сцены в последовательность кадров без окна"""
+    
+    def __init__(self, data: Dict[str, Any], width: int = 1024, height: int = 768,
+                 background: Tuple[int, int, int] = (0, 0, 0)):
+        self.width = width
+        self.height = height
+        self.rasterizer = LineRasterizer(width, height, background)
+        self.expression_parser = ExpressionParser()
+        
+        # Слои паттернов: (паттерн, процессы вычисления или None)
+        self.layers: List[Tuple[ConnectPattern, Optional[ParallelEvaluator]]] = []
+        self.static_lines = np.zeros((0, 4), dtype=np.float32)
+        self.static_colors = np.zeros((0, 3), dtype=np.float32)
+        
+        self._load_scene(data)
+    
+    @classmethod
+    def from_file(cls, config_file: str, **kwargs) -> 'OfflineRenderer':
+        """Загрузка сцены из JSON-файла; ValueError, если файл не прочитан"""
+        data = ConfigLoader.load_json(config_file)
+        if not data:
+            raise ValueError(f"OfflineRenderer: cannot load scene '{config_file}'")
+        return cls(data, **kwargs)
+    
+    def _load_scene(self, data: Dict[str, Any]):
+        # Один паттерн или список слоёв
+        parametric = data.get('parametric_lines')
+        layer_configs = parametric if isinstance(parametric, list) else [parametric]
+        for index, layer_config in enumerate(layer_configs):
+            if not isinstance(layer_config, dict):
+                continue
+            if layer_config.get('pattern', 'connect') != 'connect':
+                print(f"  Unknown pattern '{layer_config.get('pattern')}' in layer {index}")
+                continue
+            self._load_layer(layer_config)
+        
+        lines_data = data.get('lines')
+        if isinstance(lines_data, list):
+            lines: List[List[float]] = []
+            colors: List[List[float]] = []
+            for i, line_def in enumerate(lines_data):
+                try:
+                    start = line_def.get('start', [100, 100])
+                    end = line_def.get('end', [200, 200])
+                    color = line_def.get('color', [255, 0, 0])
+                    lines.append([float(start[0]), float(start[1]), float(end[0]), float(end[1])])
+                    colors.append([float(c) for c in color[:3]])
+                except Exception as e:
+                    print(f"  Error creating line {i}: {e}")
+            
+            if lines:
+                self.static_lines = np.asarray(lines, dtype=np.float32)
+                self.static_colors = np.asarray(colors, dtype=np.float32)
+    
+    def _load_layer(self, layer_config: Dict[str, Any]):
+        """Паттерн слоя; без центра - в центре кадра"""
+        config = dict(layer_config)
+        if 'center' not in config:
+            config['center'] = [self.width // 2, self.height // 2]
+        
+        pattern = ConnectPattern()
+        pattern.set_config(config)
+        pattern.set_expression_parser(self.expression_parser)
+        
+        self.layers.append((pattern, self._start_evaluator(pattern)))
+    
+    @staticmethod
+    def _start_evaluator(pattern: ConnectPattern) -> Optional[ParallelEvaluator]:
+        """Процессы для вычисления паттерна ("workers": N); None - в этом процессе"""
+        workers = pattern.config.get('workers', 0)
+        if not isinstance(workers, int) or workers <= 1 or pattern.get_line_count() <= 0:
+            return None
+        
+        try:
+            return ParallelEvaluator(pattern.config, workers)
+        except Exception as e:
+            print(f"OfflineRenderer: parallel evaluation unavailable: {e}")
+            return None
+    
+    def render_frame(self, time: float) -> np.ndarray:
+        """Кадр для момента time: массив (height, width, 4) uint8"""
+        self.rasterizer.clear()
+        self.rasterizer.draw_lines(self.static_lines, self.static_colors)
+        
+        for pattern, evaluator in self.layers:
+            lines = evaluator.evaluate(time) if evaluator is not None else None
+            if lines is None:
+                lines = pattern.calculate_all_lines(time)
+            self.rasterizer.draw_lines(lines, pattern.calculate_line_colors(time)[:, :3])
+        
+        return self.rasterizer.to_rgba()
+    
+    def render(self, output: str, fps: float = 30.0, duration: float = 5.0,
+               start_time: float = 0.0, output_format: str = 'png') -> float:
+        """
+        Рендеринг диапазона времени
+        
+        Args:
+            output: каталог для PNG-кадров или файл сырого потока ('-' - stdout)
+            output_format: 'png' или 'raw' (кадры RGBA подряд)
+        
+        Returns:
+            Производительность в кадрах в секунду
+        """
+        frame_count = max(1, int(round(duration * fps)))
+        
+        stream: Optional[BinaryIO] = None
+        if output_format == 'raw':
+            stream = sys.__stdout__.buffer if output == '-' else open(output, 'wb')
+        else:
+            os.makedirs(output, exist_ok=True)
+        
+        # Процессы, остановленные предыдущим render, запускаются заново
+        self.layers = [(pattern, evaluator if evaluator is not None else self._start_evaluator(pattern))
+                       for pattern, evaluator in self.layers]
+        
+        started = time_module.perf_counter()
+        try:
+            for frame in range(frame_count):
+                image = self.render_frame(start_time + frame / fps)
+                
+                if stream is not None:
+                    stream.write(image.tobytes())
+                else:
+                    write_png(os.path.join(output, f"frame_{frame:05d}.png"), image)
+        finally:
+            if stream is not None and stream is not sys.__stdout__.buffer:
+                stream.close()
+            self.close()
+        
+        elapsed = time_module.perf_counter() - started
+        throughput = frame_count / elapsed if elapsed > 0 else float('inf')
+        
+        print(f"OfflineRenderer: {frame_count} frames {self.width}x{self.height} "
+              f"in {elapsed:.2f}s ({throughput:.1f} fps)")
+        
+        return throughput
+    
+    def close(self):
+        """Остановка процессов вычисления; слои сцены остаются"""
+        for _, evaluator in self.layers:
+            if evaluator is not None:
+                evaluator.close()
+        self.layers = [(pattern, None) for pattern, _ in self.layers]
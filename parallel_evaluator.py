@@ -0,0 +1,170 @@
+"""
+Параллельное вычисление паттерна в нескольких процессах
+
+Итерации паттерна делятся на непрерывные диапазоны по числу
+процессов. Каждый процесс один раз при запуске собирает и компилирует
+паттерн из конфигурации, а затем в каждом кадре пишет свои линии
+прямо в общий массив float32 (multiprocessing.shared_memory).
+Обмен в кадре - только значение времени и два прохода барьера.
+"""
+import multiprocessing
+from multiprocessing import shared_memory
+from threading import BrokenBarrierError
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from math_engine.expression_parser import ExpressionParser
+from patterns.connect_pattern import ConnectPattern
+
+
+# Ожидание процессов в кадре, с; дольше - барьер считается сломанным
+FRAME_TIMEOUT = 10.0
+
+# Ожидание запуска процессов (импорт модулей и компиляция сцены), с
+STARTUP_TIMEOUT = 30.0
+
+
+def _worker_main(config: Dict[str, Any], shm_name: str, line_count: int,
+                 start: int, stop: int, time_value, stop_flag, barrier):
+    """
+    Цикл процесса: ждать кадр, вычислить итерации start..stop-1
+    
+    Первый проход барьера - готовность после компиляции сцены.
+    Ошибка кадра печатается один раз для каждого текста ошибки.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    lines = out = None
+    try:
+        lines = np.ndarray((line_count, 4), dtype=np.float32, buffer=shm.buf)
+        
+        # Сцена собирается один раз при запуске процесса
+        try:
+            pattern = ConnectPattern()
+            pattern.set_config(config)
+            pattern.set_expression_parser(ExpressionParser())
+            
+            segments_count = pattern.scene.segments_count
+            n = np.arange(start, stop, dtype=np.float64)
+            out = lines[start * segments_count:stop * segments_count]
+        except Exception:
+            barrier.abort()
+            raise
+        
+        reported = set()
+        
+        def calculate(time: float):
+            try:
+                pattern.calculate_iteration_lines(n, time, out=out)
+            except Exception as e:
+                if str(e) not in reported:
+                    reported.add(str(e))
+                    print(f"ParallelEvaluator worker {start}-{stop}: {e}")
+        
+        # Точки компилируются первым вычислением, до сигнала готовности
+        calculate(0.0)
+        barrier.wait()
+        
+        while True:
+            barrier.wait()
+            if stop_flag.value:
+                break
+            
+            calculate(time_value.value)
+            
+            barrier.wait()
+    
+    except BrokenBarrierError:
+        pass
+    finally:
+        # Виды на буфер освобождаются до закрытия общей памяти
+        lines = out = None
+        shm.close()
+
+
+class ParallelEvaluator:
+    """Вычисление всех линий паттерна пулом процессов"""
+    
+    def __init__(self, config: Dict[str, Any], workers: int):
+        pattern = ConnectPattern()
+        pattern.set_config(config)
+        
+        self.line_count = pattern.get_line_count()
+        iterations = pattern.scene.count
+        workers = max(1, min(workers, iterations))
+        
+        # spawn: процессы не наследуют GL-контекст и состояние окна
+        context = multiprocessing.get_context('spawn')
+        
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, self.line_count * 4 * 4))
+        self.lines = np.ndarray((self.line_count, 4), dtype=np.float32, buffer=self._shm.buf)
+        self.lines.fill(0.0)
+        
+        self._time = context.Value('d', 0.0, lock=False)
+        self._stop = context.Value('b', 0, lock=False)
+        self._barrier = context.Barrier(workers + 1)
+        
+        # Непрерывные диапазоны итераций почти равной длины
+        bounds = np.linspace(0, iterations, workers + 1).astype(int)
+        self._processes: List[multiprocessing.Process] = []
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            process = context.Process(
+                target=_worker_main,
+                args=(config, self._shm.name, self.line_count, int(start), int(stop),
+                      self._time, self._stop, self._barrier),
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+        
+        # Первый кадр не ждёт запуска процессов
+        try:
+            self._barrier.wait(STARTUP_TIMEOUT)
+        except BrokenBarrierError:
+            self.close()
+            raise RuntimeError("workers failed to start")
+        
+        print(f"ParallelEvaluator: {self.line_count} lines on {workers} processes")
+    
+    def evaluate(self, time: float) -> Optional[np.ndarray]:
+        """
+        Вычисление кадра
+        
+        Returns:
+            Массив (line_count, 4) в общей памяти - действителен
+            до следующего вызова; None, если процессы недоступны
+        """
+        if self._shm is None or self._barrier.broken:
+            return None
+        
+        self._time.value = time
+        try:
+            self._barrier.wait(FRAME_TIMEOUT)  # Старт кадра
+            self._barrier.wait(FRAME_TIMEOUT)  # Все диапазоны записаны
+        except BrokenBarrierError:
+            print("ParallelEvaluator: workers stopped responding")
+            return None
+        
+        return self.lines
+    
+    def close(self):
+        """Остановка процессов и освобождение общей памяти"""
+        if self._shm is None:
+            return
+        
+        self._stop.value = 1
+        try:
+            self._barrier.wait(FRAME_TIMEOUT)
+        except BrokenBarrierError:
+            pass
+        
+        for process in self._processes:
+            process.join(timeout=FRAME_TIMEOUT)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+        
+        self.lines = None
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
@@ -0,0 +1,136 @@
+"""
+Слой параметрических линий
+
+Слой - один паттерн сцены со своим вычислителем (процессы, запечённые
+кадры, уровень детализации) и диапазоном линий в общем вершинном
+буфере аддона. Все слои аддона рисуются одним вызовом.
+"""
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+from frame_bake import BakedAnimation, load_or_bake
+from level_of_detail import LevelOfDetail
+from parallel_evaluator import ParallelEvaluator
+
+
+class ParametricLayer:
+    """Паттерн слоя и способ вычисления его линий"""
+    
+    def __init__(self, pattern, auto_center: bool):
+        self.pattern = pattern
+        self.auto_center = auto_center  # Центр задаётся окном, а не геометрией
+        self.evaluator: Optional[ParallelEvaluator] = None  # При "workers" > 1
+        self.baked: Optional[BakedAnimation] = None  # Кадры при "bake"
+        self.lod: Optional[LevelOfDetail] = None  # При "frame_budget_ms"
+        self.offset = 0  # Первая линия слоя в общем буфере
+    
+    @property
+    def config(self) -> Dict[str, Any]:
+        return self.pattern.config
+    
+    @property
+    def line_count(self) -> int:
+        return self.pattern.get_line_count()
+    
+    def setup(self):
+        """Вычислитель слоя после сборки паттерна или смены конфигурации"""
+        self._restart_evaluator()
+        self._setup_bake()
+        self._setup_lod()
+    
+    def _restart_evaluator(self):
+        """
+        Процессы для вычисления паттерна ("workers": N в конфигурации)
+        
+        Процессы компилируют сцену при запуске, поэтому при любой
+        смене конфигурации они перезапускаются.
+        """
+        self.close()
+        
+        workers = self.config.get('workers', 0)
+        if isinstance(workers, int) and workers > 1 and self.line_count > 0:
+            try:
+                self.evaluator = ParallelEvaluator(self.config, workers)
+            except Exception as e:
+                print(f"ParametricLines: parallel evaluation unavailable: {e}")
+                self.evaluator = None
+    
+    def _setup_bake(self):
+        """Запечённые кадры периода анимации ("bake" в конфигурации)"""
+        self.baked = load_or_bake(self.config, self.line_count, self.evaluate)
+        
+        # Воспроизведение не вычисляет выражения: процессы не нужны
+        if self.baked is not None:
+            self.close()
+    
+    def _setup_lod(self):
+        """
+        Уровень детализации по бюджету кадра ("frame_budget_ms")
+        
+        Работает при вычислении в этом процессе: запечённые кадры
+        и ParallelEvaluator всегда дают полный набор линий.
+        """
+        self.lod = None
+        
+        budget = self.config.get('frame_budget_ms')
+        if not isinstance(budget, (int, float)) or isinstance(budget, bool) or budget <= 0:
+            return
+        if self.baked is not None or self.evaluator is not None:
+            print("ParametricLines: frame_budget_ms is ignored with bake/workers")
+            return
+        
+        self.lod = LevelOfDetail(float(budget), self.pattern.scene.count)
+    
+    def close(self):
+        """Остановка процессов вычисления"""
+        if self.evaluator is not None:
+            self.evaluator.close()
+            self.evaluator = None
+    
+    def calculate(self, time: float) -> np.ndarray:
+        """
+        Линии кадра: из запечённого файла или вычислением
+        
+        При пониженной детализации строк меньше line_count.
+        """
+        if self.baked is not None:
+            return self.baked.frame(time)
+        
+        # Пониженная детализация: равномерное подмножество итераций
+        if self.lod is not None and self.lod.stride > 1:
+            return self.pattern.calculate_iteration_lines(self.lod.indices(), time)
+        
+        return self.evaluate(time)
+    
+    def calculate_colors(self, time: float) -> np.ndarray:
+        """
+        Цвета линий кадра в том же порядке, что и calculate(time)
+        
+        Цвета не запекаются и не считаются в процессах: выражения
+        цвета вычисляются здесь, а без зависимости от времени паттерн
+        возвращает один и тот же массив между кадрами.
+        """
+        if self.baked is None and self.lod is not None and self.lod.stride > 1:
+            return self.pattern.calculate_line_colors(time, self.lod.indices())
+        
+        return self.pattern.calculate_line_colors(time)
+    
+    def evaluate(self, time: float) -> np.ndarray:
+        """Все линии кадра: в процессах ParallelEvaluator или в этом процессе"""
+        if self.evaluator is not None:
+            coords = self.evaluator.evaluate(time)
+            if coords is not None:
+                return coords
+            
+            print("ParametricLines: falling back to single-process evaluation")
+            self.close()
+        
+        return self.pattern.calculate_all_lines(time)
+    
+    def record_frame(self, frame_ms: float):
+        """Время кадра слоя для уровня детализации"""
+        if self.lod is not None and self.lod.record(frame_ms):
+            iterations = len(self.lod.indices())
+            print(f"ParametricLines: LOD stride {self.lod.stride} "
+                  f"({iterations} of {self.lod.iterations} iterations)")
@@ -1,10 +1,33 @@
 """
 Модуль паттернов - ТОЛЬКО connect
+
+Классы импортируются при первом обращении (PEP 562).
 """
-from .base_pattern import BasePattern
-from .connect_pattern import ConnectPattern
+import importlib
+from typing import TYPE_CHECKING
+
+# Имя -> подмодуль, из которого оно берётся
+_LAZY_EXPORTS = {
+    'BasePattern': 'base_pattern',
+    'ConnectPattern': 'connect_pattern',
+}
+
+if TYPE_CHECKING:
+    from .base_pattern import BasePattern
+    from .connect_pattern import ConnectPattern
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     'BasePattern',
     'ConnectPattern'  # ← только один паттерн
-]
\ No newline at end of file
+]
@@ -5,6 +5,10 @@ from abc import ABC, abstractmethod
 from typing import Tuple, Dict, Any
 import math
 
+import numpy as np
+
+from .line_colors import hsv_to_rgb
+
 
 class BasePattern(ABC):
     """Абстрактный базовый класс паттерна"""
@@ -32,6 +36,22 @@ class BasePattern(ABC):
         """
         pass
     
+    def calculate_all_lines(self, time: float) -> np.ndarray:
+        """
+        Вычисление всех линий паттерна за один вызов
+        
+        Returns:
+            Массив float32 формы (line_count, 4): x1, y1, x2, y2
+        """
+        line_count = self.get_line_count()
+        lines = np.empty((line_count, 4), dtype=np.float32)
+        
+        for n in range(line_count):
+            (x1, y1), (x2, y2) = self.calculate_line(n, time)
+            lines[n] = (x1, y1, x2, y2)
+        
+        return lines
+    
     def set_config(self, config: Dict[str, Any]):
         """Установка конфигурации паттерна"""
         self.config = config
@@ -56,31 +76,22 @@ class BasePattern(ABC):
         hue = (n / max(1, self.get_line_count())) * 360
         return self._hsv_to_rgb(hue, 100, 100)
     
-    def _hsv_to_rgb(self, h: float, s: float, v: float) -> Tuple[int, int, int]:
-        """Преобразование HSV в RGB"""
-        h = h % 360
-        s = max(0, min(100, s)) / 100
-        v = max(0, min(100, v)) / 100
+    def calculate_line_colors(self, time: float) -> np.ndarray:
+        """
+        Цвета всех линий паттерна
         
-        c = v * s
-        x = c * (1 - abs((h / 60) % 2 - 1))
-        m = v - c
+        Returns:
+            Массив uint8 формы (line_count, 4) RGBA
+        """
+        line_count = self.get_line_count()
+        colors = np.full((line_count, 4), 255, dtype=np.uint8)
         
-        if 0 <= h < 60:
-            r, g, b = c, x, 0
-        elif 60 <= h < 120:
-            r, g, b = x, c, 0
-        elif 120 <= h < 180:
-            r, g, b = 0, c, x
-        elif 180 <= h < 240:
-            r, g, b = 0, x, c
-        elif 240 <= h < 300:
-            r, g, b = x, 0, c
-        else:
-            r, g, b = c, 0, x
+        for n in range(line_count):
+            colors[n, :3] = self.get_line_color(n, time)
         
-        return (
-            int((r + m) * 255),
-            int((g + m) * 255),
-            int((b + m) * 255)
-        )
\ No newline at end of file
+        return colors
+    
+    def _hsv_to_rgb(self, h: float, s: float, v: float) -> Tuple[int, int, int]:
+        """Преобразование HSV в RGB"""
+        r, g, b = hsv_to_rgb(h, s, v)
+        return int(r), int(g), int(b)
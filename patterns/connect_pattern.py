@@ -1,16 +1,50 @@
 """Паттерн "connect" - соединение произвольных точек"""
-import math
-from typing import Tuple, Dict, Any, List
+import json
+from typing import Tuple, Dict, Any, List, Optional
+
+import numpy as np
+
 from .base_pattern import BasePattern
+from .line_colors import LineColors
+from .scene import CompiledScene, SceneCompiler
+from .scene_cache import SceneCache
+from math_engine.diagnostics import diagnostics, source_key
 from math_engine.function_library import FunctionLibrary
+from math_engine.point_compiler import PointCompiler, CompiledPoint
 
 
 class ConnectPattern(BasePattern):
     """Паттерн соединения точек"""
     
+    # Угол точки по умолчанию
+    DEFAULT_POINT_PARAMS = {'angle': 'n * angle_step'}
+    
     def __init__(self):
         super().__init__()
         self.function_library = None  # Будет установлен позже
+        
+        # Проверенная сцена со стандартными значениями; кадр читает
+        # только её поля, а не словари конфигурации
+        self.scene: CompiledScene = SceneCompiler.compile({})
+        
+        # Скомпилированные точки по канонической записи конфигурации:
+        # при смене конфигурации неизменённые точки не компилируются заново
+        self._program_cache: Dict[str, Optional[CompiledPoint]] = {}
+        
+        # Кэш скомпилированных сцен на диске (включается приложением)
+        self.scene_cache: Optional[SceneCache] = None
+        
+        # Таблица вершин (point_index, iteration) последнего кадра:
+        # соседние сегменты делят общую точку и не считают её повторно
+        self._vertex_time = None
+        self._vertex_table: Optional[np.ndarray] = None
+        
+        # Массив индексов итераций; один и тот же объект между кадрами,
+        # чтобы зависящие только от n параметры брались из кэша
+        self._iteration_indices: Optional[np.ndarray] = None
+        
+        # Скомпилированные цвета линий текущей сцены
+        self._line_colors: Optional[LineColors] = None
     
     @property
     def pattern_id(self) -> str:
@@ -18,88 +52,243 @@ class ConnectPattern(BasePattern):
     
     def get_line_count(self) -> int:
         """Количество линий = (точек - 1) * итераций"""
-        points_config = self.config.get('points', [])
-        iterations = self.config.get('count', 36)
-        return max(0, (len(points_config) - 1) * iterations)
+        return self.scene.line_count
+    
+    def set_config(self, config: Dict[str, Any]):
+        """
+        Установка конфигурации паттерна
+        
+        Конфигурация проверяется и собирается в CompiledScene.
+        Скомпилированные точки с прежней конфигурацией и массив
+        индексов (при том же count) сохраняются вместе с кэшами.
+        """
+        old_count = self.scene.count
+        super().set_config(config)
+        self.scene = SceneCompiler.compile(config)
+        self._invalidate(keep_indices=self.scene.count == old_count)
+    
+    def set_expression_parser(self, parser):
+        """Установка парсера выражений"""
+        super().set_expression_parser(parser)
+        self.function_library = None
+        self._program_cache = {}
+        self._invalidate()
+    
+    def reuse_programs(self, other: 'ConnectPattern'):
+        """
+        Скомпилированные точки другого паттерна (со своим парсером)
+        
+        Точки копируются под парсер этого паттерна: при сборке сцены
+        в фоновом потоке неизменённые точки не компилируются заново.
+        """
+        if self.function_library is None:
+            self.function_library = FunctionLibrary(self.expression_parser)
+        
+        for key, program in list(other._program_cache.items()):
+            if program is not None and key not in self._program_cache:
+                self._program_cache[key] = program.rebind(self.function_library, self.expression_parser)
+    
+    def _invalidate(self, keep_indices: bool = False):
+        """Сброс списка точек и таблицы вершин"""
+        self.scene.programs = None
+        self._line_colors = None
+        self._vertex_time = None
+        self._vertex_table = None
+        if not keep_indices:
+            self._iteration_indices = None
     
     def calculate_line(self, n: int, time: float) -> Tuple[Tuple[float, float], Tuple[float, float]]:
         """Вычисление линии n"""
-        points_config = self.config.get('points', [])
-        if len(points_config) < 2:
+        segments_count = self.scene.segments_count
+        if segments_count < 1:
             return ((0, 0), (0, 0))
         
-        iterations = self.config.get('count', 36)
-        points_count = len(points_config)
+        segment_index = n % segments_count
+        iteration = n // segments_count
         
-        segment_index = n % (points_count - 1)
-        iteration = n // (points_count - 1)
-        
-        point1 = self._calculate_point_via_library(
-            points_config[segment_index], iteration, time
-        )
-        point2 = self._calculate_point_via_library(
-            points_config[segment_index + 1], iteration, time
-        )
+        vertices = self._get_vertex_table(time)
+        point1 = tuple(vertices[segment_index, iteration].tolist())
+        point2 = tuple(vertices[segment_index + 1, iteration].tolist())
         
         return (point1, point2)
     
-    def _calculate_point_via_library(self, point_config: Dict[str, Any], 
-                                    n: int, time: float) -> Tuple[float, float]:
-        """Вычисление точки через FunctionLibrary"""
-        # Инициализируем function_library если еще не инициализирован
-        if self.function_library is None:
-            self.function_library = FunctionLibrary(self.expression_parser)
+    def calculate_all_lines(self, time: float) -> np.ndarray:
+        """Вычисление всех линий кадра массивными операциями"""
+        if self.scene.line_count <= 0:
+            return np.zeros((0, 4), dtype=np.float32)
+        
+        return self._lines_from_vertices(self._get_vertex_table(time))
+    
+    def calculate_iteration_lines(self, n: np.ndarray, time: float,
+                                  out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Линии подмножества итераций n
+        
+        Массив n стоит передавать один и тот же между кадрами:
+        по нему кэшируются параметры, зависящие только от n.
+        
+        Args:
+            out: массив float32 (len(n) * (points - 1), 4) для результата
+        
+        Returns:
+            Массив (len(n) * (points - 1), 4) в порядке итераций n
+        """
+        if self.scene.segments_count < 1:
+            return np.zeros((0, 4), dtype=np.float32)
+        
+        return self._lines_from_vertices(self._calculate_vertex_table(n, time), out)
+    
+    def calculate_line_colors(self, time: float, n: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Цвета линий итераций n (по умолчанию всех) массивными операциями
         
-        # Получаем имя функции ДО try блока
-        func_name = point_config.get('func', 'circle')
+        Returns:
+            Массив uint8 (len(n) * (points - 1), 4) RGBA в порядке линий
+        """
+        if n is None:
+            n = self._get_iteration_indices()
+        if self.scene.segments_count < 1:
+            return np.zeros((0, 4), dtype=np.uint8)
         
         try:
-            # Копируем конфиг
-            params = point_config.copy()
-            total_count = self.config.get('count', 36)
-            
-            context = {
-                'n': n,
-                'time': time,
-                'count': total_count,
-                'angle_step': 2 * math.pi / total_count if total_count > 0 else 0,
-            }
-            
-            # Парсим все строковые параметры перед передачей в функцию
-            if self.expression_parser:
-                parsed_params = {}
-                for key, value in params.items():
-                    if key == 'func':
-                        continue
-                    elif isinstance(value, str):
-                        # Парсим выражение с контекстом
-                        parsed_params[key] = self.expression_parser.parse(value, context)
-                    else:
-                        parsed_params[key] = value
-                params = parsed_params
+            return self._get_line_colors().calculate(n, time, self.scene)
+        except Exception as e:
+            colors = [self.scene.color, self.scene.point_colors]
+            diagnostics.error("ConnectPattern.color", source_key(colors), f"Error calculating line colors: {e}")
+            return np.full((len(n) * self.scene.segments_count, 4), 255, dtype=np.uint8)
+    
+    def _get_line_colors(self) -> LineColors:
+        """Компиляция цветов при первом обращении после смены конфигурации"""
+        if self._line_colors is None:
+            if self.function_library is None:
+                self.function_library = FunctionLibrary(self.expression_parser)
             
-            # Добавляем angle в params если его нет
-            if 'angle' not in params:
-                # По умолчанию используем n * angle_step
-                angle_step = 2 * math.pi / total_count if total_count > 0 else 0
-                params['angle'] = n * angle_step
+            compiler = PointCompiler(self.function_library, self.expression_parser)
+            self._line_colors = LineColors.compile(self.scene, compiler)
+        
+        return self._line_colors
+    
+    @staticmethod
+    def _lines_from_vertices(vertices: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Линии из таблицы вершин (points_count, iterations, 2)"""
+        segments_count = vertices.shape[0] - 1
+        iterations = vertices.shape[1]
+        
+        # Линия с номером iteration * segments_count + segment_index
+        if out is None:
+            out = np.empty((iterations * segments_count, 4), dtype=np.float32)
+        lines = out.reshape(iterations, segments_count, 4)
+        lines[:, :, 0:2] = vertices[:-1].transpose(1, 0, 2)
+        lines[:, :, 2:4] = vertices[1:].transpose(1, 0, 2)
+        
+        return out
+    
+    def _get_vertex_table(self, time: float) -> np.ndarray:
+        """Таблица вершин кадра, вычисляется один раз на время time"""
+        if self._vertex_table is None or time != self._vertex_time:
+            self._vertex_table = self._calculate_vertex_table(self._get_iteration_indices(), time)
+            self._vertex_time = time
+        
+        return self._vertex_table
+    
+    def _get_iteration_indices(self) -> np.ndarray:
+        """Индексы всех итераций 0..count-1 (float64, как и в скалярном parse)"""
+        if self._iteration_indices is None:
+            self._iteration_indices = np.arange(self.scene.count, dtype=np.float64)
+        
+        return self._iteration_indices
+    
+    def _calculate_vertex_table(self, n: np.ndarray, time: float) -> np.ndarray:
+        """
+        Таблица вершин кадра: каждая точка считается один раз для всех n
+        
+        Returns:
+            Массив формы (points_count, len(n), 2)
+        """
+        programs = self._get_programs()
+        vertices = np.empty((len(programs), len(n), 2))
+        
+        # Точки не изменяют контекст: один словарь на кадр
+        context = self.scene.frame_context(n, time)
+        for point_index, (program, point_config) in enumerate(zip(programs, self.scene.points)):
+            vertices[point_index] = self._calculate_points_batch(program, point_config, context)
+        
+        return vertices
+    
+    def _get_programs(self) -> List[CompiledPoint]:
+        """Компиляция точек при первом обращении после смены конфигурации"""
+        if self.scene.programs is None:
+            if self.function_library is None:
+                self.function_library = FunctionLibrary(self.expression_parser)
             
-            # Вычисляем через библиотеку функций
-            coords = self.function_library.evaluate(func_name, params, context)
+            keys = [json.dumps(point_config, sort_keys=True, default=str)
+                    for point_config in self.scene.points]
             
-            center_x = self.config.get('center_x', 400)
-            center_y = self.config.get('center_y', 300)
+            # Все точки уже скомпилированы (смена count, центра) - диск не нужен
+            reused = all(key in self._program_cache for key in keys)
             
-            if 'center' in self.config:
-                center = self.config['center']
-                if len(center) >= 2:
-                    center_x, center_y = center[0], center[1]
+            programs = None if reused else self._load_cached_programs()
+            if programs is None:
+                programs = self._compile_programs(keys)
+                if self.scene_cache is not None and not reused:
+                    self.scene_cache.save(self.scene, programs, self._get_iteration_indices())
             
-            final_x = center_x + coords[0] if len(coords) > 0 else center_x
-            final_y = center_y + coords[1] if len(coords) > 1 else center_y
+            # В кэше остаются только точки текущей конфигурации
+            self._program_cache = dict(zip(keys, programs))
+            self.scene.programs = programs
+        
+        return self.scene.programs
+    
+    def _load_cached_programs(self) -> Optional[List[CompiledPoint]]:
+        """Точки сцены из кэша на диске"""
+        if self.scene_cache is None:
+            return None
+        
+        programs = self.scene_cache.load(self.scene, self.function_library, self.expression_parser,
+                                         self._get_iteration_indices())
+        if programs is not None and len(programs) != len(self.scene.points):
+            return None
+        return programs
+    
+    def _compile_programs(self, keys: List[str]) -> List[Optional[CompiledPoint]]:
+        """Компиляция точек; неизменённые берутся из кэша прежней конфигурации"""
+        compiler = PointCompiler(self.function_library, self.expression_parser)
+        cache = {}
+        programs = []
+        for key, point_config in zip(keys, self.scene.points):
+            if key not in cache:
+                if key in self._program_cache:
+                    cache[key] = self._program_cache[key]
+                else:
+                    cache[key] = self._compile_point(compiler, point_config)
+            programs.append(cache[key])
+        return programs
+    
+    def _compile_point(self, compiler: PointCompiler, point_config: Dict[str, Any]) -> Optional[CompiledPoint]:
+        """Компиляция одной точки; None, если конфигурация некорректна"""
+        try:
+            return compiler.compile_point(point_config, self.DEFAULT_POINT_PARAMS)
+        except Exception as e:
+            func_name = point_config.get('func', 'circle') if isinstance(point_config, dict) else '?'
+            diagnostics.error("ConnectPattern.compile", source_key(point_config),
+                              f"Error compiling point (func={func_name}): {e}")
+            return None
+    
+    def _calculate_points_batch(self, program: Optional[CompiledPoint], point_config: Any,
+                                context: Dict[str, Any]) -> np.ndarray:
+        """
+        Вычисление точки сразу для массива итераций context['n']
+        
+        Ошибки дедуплицируются по конфигурации точки, а не по тексту исключения.
+        """
+        try:
+            if program is None:
+                raise ValueError("point is not compiled")
             
-            return (final_x, final_y)
-                    
+            return program.evaluate(context) + self.scene.center
+        
         except Exception as e:
-            print(f"Error calculating point (func={func_name}): {e}")
-            return (400, 300)
\ No newline at end of file
+            func_name = program.func.function_id if program is not None else '?'
+            diagnostics.error("ConnectPattern.calculate", source_key(point_config),
+                              f"Error calculating point (func={func_name}): {e}")
+            return np.tile((400.0, 300.0), (len(context['n']), 1))
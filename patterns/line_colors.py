@@ -0,0 +1,176 @@
+"""
+Цвета линий паттерна по выражениям
+
+Цвет задаётся в конфигурации паттерна (для всех линий) или точки
+(для сегмента от этой точки к следующей):
+    "color": [255, "128 + 127*sin(time)", 0]          - RGB(A), 0..255
+    "color": {"rgb": ["n * 4", 0, "segment * 60"]}    - то же
+    "color": {"hsv": ["n * 10 + time * 90", 100, 100]} - H 0..360, S и V 0..100
+Выражения вычисляются сразу для всех линий от переменных n, time,
+segment (номер сегмента), segments, count и angle_step.
+"""
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from math_engine.point_compiler import CompiledParam, PointCompiler
+
+
+# Переменные, которые цвет добавляет к контексту кадра
+COLOR_NAMES = ('segment', 'segments')
+
+# Прозрачность по умолчанию
+DEFAULT_ALPHA = 255.0
+
+
+def hsv_to_rgb(h, s, v) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Преобразование HSV в RGB для массивов
+    
+    Args:
+        h: тон в градусах, s и v - 0..100
+    
+    Returns:
+        Каналы r, g, b в диапазоне 0..255
+    """
+    h = np.mod(h, 360.0)
+    s = np.clip(s, 0.0, 100.0) / 100
+    v = np.clip(v, 0.0, 100.0) / 100
+    
+    c = v * s
+    x = c * (1 - np.abs(np.mod(h / 60, 2) - 1))
+    m = v - c
+    zero = np.zeros_like(c)
+    
+    sector = np.minimum((h // 60).astype(np.int64), 5)
+    r = np.choose(sector, (c, x, zero, zero, x, c))
+    g = np.choose(sector, (x, c, c, x, zero, zero))
+    b = np.choose(sector, (zero, zero, x, c, c, x))
+    
+    return (r + m) * 255, (g + m) * 255, (b + m) * 255
+
+
+class ColorProgram:
+    """Скомпилированные каналы одного цвета"""
+    
+    def __init__(self, mode: str, channels: Sequence[CompiledParam]):
+        self.mode = mode  # 'rgb' или 'hsv'
+        self.channels = list(channels)  # 3 канала и необязательная прозрачность
+    
+    @property
+    def time_dependent(self) -> bool:
+        """Цвет меняется во времени (иначе вычисляется один раз)"""
+        return any(channel.compiled is not None and 'time' in channel.compiled[1]
+                   for channel in self._params())
+    
+    def _params(self):
+        for channel in self.channels:
+            yield channel
+            yield from (param for _, param in channel.hoisted)
+    
+    def evaluate(self, context: Dict[str, Any], out: np.ndarray):
+        """
+        Запись цвета в out формы (..., 4) по контексту
+        
+        Массивы контекста (n, segment) уже приведены к форме out[..., 0].
+        """
+        values = [channel.evaluate(context) for channel in self.channels]
+        
+        if self.mode == 'hsv':
+            values[:3] = hsv_to_rgb(*values[:3])
+        
+        for index, value in enumerate(values):
+            out[..., index] = np.clip(value, 0.0, 255.0)
+        if len(values) == 3:
+            out[..., 3] = DEFAULT_ALPHA
+
+
+class LineColors:
+    """Цвета всех линий паттерна: цвет паттерна и цвета точек-сегментов"""
+    
+    def __init__(self, default: Optional[ColorProgram], segments: List[Optional[ColorProgram]]):
+        self.default = default
+        self.segments = segments  # Цвет сегмента от точки i к точке i+1 или None
+        
+        programs = [program for program in [default] + segments if program is not None]
+        self.time_dependent = any(program.time_dependent for program in programs)
+        
+        # Последний результат: без зависимости от времени он не пересчитывается
+        self._n: Optional[np.ndarray] = None
+        self._grids: Dict[Any, Tuple[np.ndarray, np.ndarray]] = {}
+        self._colors: Optional[np.ndarray] = None
+    
+    @classmethod
+    def compile(cls, scene, compiler: PointCompiler) -> 'LineColors':
+        """Компиляция цветов сцены (CompiledScene.color и point_colors)"""
+        default = cls._compile_color(scene.color, compiler)
+        segments = [cls._compile_color(color, compiler)
+                    for color in scene.point_colors[:scene.segments_count]]
+        return cls(default, segments)
+    
+    @staticmethod
+    def _compile_color(color: Optional[Tuple[str, List[Any]]],
+                       compiler: PointCompiler) -> Optional[ColorProgram]:
+        if color is None:
+            return None
+        mode, channels = color
+        return ColorProgram(mode, [compiler.compile_param(value, COLOR_NAMES) for value in channels])
+    
+    def calculate(self, n: np.ndarray, time: float, scene) -> np.ndarray:
+        """
+        Цвета линий итераций n в порядке линий паттерна
+        
+        Returns:
+            Массив uint8 (len(n) * segments, 4) RGBA; без зависимости
+            от времени - один и тот же объект между кадрами
+        """
+        if n is not self._n:
+            self._n = n
+            self._grids = {}
+            self._colors = None
+        elif self._colors is not None and not self.time_dependent:
+            return self._colors
+        
+        segments_count = scene.segments_count
+        colors = np.empty((len(n), segments_count, 4))
+        context = scene.frame_context(n, time)
+        context['segments'] = segments_count
+        
+        default_segments = [index for index in range(segments_count)
+                            if index >= len(self.segments) or self.segments[index] is None]
+        if len(default_segments) == segments_count:
+            self._evaluate(self.default, context, n, default_segments, colors)
+        elif default_segments:
+            # Выборка сегментов - копия: результат записывается обратно
+            target = colors[:, default_segments]
+            self._evaluate(self.default, context, n, default_segments, target)
+            colors[:, default_segments] = target
+        
+        for index, program in enumerate(self.segments):
+            if program is not None:
+                self._evaluate(program, context, n, [index], colors[:, index:index + 1])
+        
+        self._colors = colors.astype(np.uint8).reshape(-1, 4)
+        return self._colors
+    
+    def _evaluate(self, program: Optional[ColorProgram], context: Dict[str, Any], n: np.ndarray,
+                  segments: List[int], out: np.ndarray):
+        """
+        Цвет для сетки (итерации x сегменты)
+        
+        Массивы сетки - одни и те же объекты между кадрами, чтобы
+        каналы, зависящие только от n, брались из кэша параметров.
+        """
+        if program is None:
+            out[:] = 255.0
+            return
+        
+        key = tuple(segments)
+        grid = self._grids.get(key)
+        if grid is None:
+            shape = (len(n), len(segments))
+            grid = (np.broadcast_to(n[:, None], shape),
+                    np.broadcast_to(np.asarray(segments, dtype=np.float64), shape))
+            self._grids[key] = grid
+        
+        program.evaluate({**context, 'n': grid[0], 'segment': grid[1]}, out)
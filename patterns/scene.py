@@ -0,0 +1,158 @@
+"""
+Скомпилированная сцена паттерна
+
+Конфигурация из JSON проверяется и дополняется стандартными
+значениями паттерна (DefaultsManager) один раз при загрузке. Кадр работает
+только с полями CompiledScene: число итераций, центр, шаг угла
+и скомпилированные точки, без обращений к словарям конфигурации.
+"""
+import math
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from config.defaults import DefaultsManager
+from math_engine.diagnostics import diagnostics
+
+
+class CompiledScene:
+    """Разобранная сцена паттерна connect"""
+    
+    __slots__ = ('count', 'center', 'angle_step', 'points', 'segments_count',
+                 'line_count', 'programs', 'color', 'point_colors')
+    
+    def __init__(self, count: int, center: Tuple[float, float], points: List[Any],
+                 color: Optional[Tuple[str, List[Any]]] = None,
+                 point_colors: Optional[List[Optional[Tuple[str, List[Any]]]]] = None):
+        self.count = count
+        self.center = center
+        self.angle_step = 2 * math.pi / count if count > 0 else 0
+        self.points = points  # Конфигурации точек (без "color")
+        self.segments_count = max(0, len(points) - 1)
+        self.line_count = self.segments_count * count
+        self.programs = None  # Скомпилированные точки, заполняет паттерн
+        
+        # Цвет линий: ('rgb' | 'hsv', каналы) паттерна и сегментов от каждой точки
+        self.color = color
+        self.point_colors = point_colors or [None] * len(points)
+    
+    def frame_context(self, n, time: float) -> Dict[str, Any]:
+        """
+        Контекст вычисления точек кадра (общий для всех точек)
+        
+        n приводится к float64: целые массивы numpy переполняются
+        (n*n*n*n) и не возводятся в отрицательную степень (n**-1).
+        Массив float64 передаётся как есть, чтобы кэш по n работал.
+        """
+        return {
+            'n': np.asarray(n, dtype=np.float64),
+            'time': time,
+            'count': self.count,
+            'angle_step': self.angle_step,
+        }
+
+
+class SceneCompiler:
+    """Проверка конфигурации и сборка CompiledScene"""
+    
+    @classmethod
+    def compile(cls, config: Dict[str, Any]) -> CompiledScene:
+        """
+        Сборка сцены из конфигурации паттерна
+        
+        Исходная конфигурация не изменяется (apply_global_defaults
+        работает с копией). Некорректные поля сообщаются через diagnostics
+        и заменяются стандартными.
+        """
+        if not isinstance(config, dict):
+            cls._error('config', f"pattern config must be an object, got {type(config).__name__}")
+            config = {}
+        
+        resolved = DefaultsManager.apply_global_defaults(config)
+        
+        points = resolved.get('points', [])
+        if not isinstance(points, list):
+            cls._error('points', "'points' must be a list")
+            points = []
+        # Цвет точки не входит в её вычисление: он задаёт цвет сегмента
+        point_colors = []
+        for index, point in enumerate(points):
+            if not isinstance(point, dict):
+                cls._error(f'points[{index}]', f"point {index} must be an object")
+                point_colors.append(None)
+            elif 'color' in point:
+                point_colors.append(cls._color(point.pop('color'), f'points[{index}].color'))
+            else:
+                point_colors.append(None)
+        
+        return CompiledScene(cls._count(resolved), cls._center(config), points,
+                             cls._color(resolved.get('color'), 'color'), point_colors)
+    
+    @classmethod
+    def _count(cls, config: Dict[str, Any]) -> int:
+        count = config.get('count')
+        if isinstance(count, float) and count.is_integer():
+            count = int(count)
+        if isinstance(count, bool) or not isinstance(count, int):
+            cls._error('count', f"'count' must be an integer, got {count!r}")
+            return DefaultsManager.GLOBAL_DEFAULTS['count']
+        return max(0, count)
+    
+    @classmethod
+    def _center(cls, config: Dict[str, Any]) -> Tuple[float, float]:
+        """
+        Центр: "center", затем "center_x"/"center_y", затем стандартный
+        
+        Берётся из исходной конфигурации: стандартный "center" не должен
+        перекрывать заданные center_x/center_y.
+        """
+        default_x, default_y = DefaultsManager.GLOBAL_DEFAULTS['center']
+        
+        if 'center' in config:
+            center = config['center']
+            if (isinstance(center, (list, tuple)) and len(center) >= 2
+                    and all(cls._is_number(value) for value in center[:2])):
+                return float(center[0]), float(center[1])
+            cls._error('center', f"'center' must be [x, y], got {center!r}")
+            return float(default_x), float(default_y)
+        
+        center_x = config.get('center_x', default_x)
+        center_y = config.get('center_y', default_y)
+        if not (cls._is_number(center_x) and cls._is_number(center_y)):
+            cls._error('center', "'center_x'/'center_y' must be numbers")
+            return float(default_x), float(default_y)
+        return float(center_x), float(center_y)
+    
+    @classmethod
+    def _color(cls, color: Any, field: str) -> Optional[Tuple[str, List[Any]]]:
+        """
+        Цвет: [r, g, b(, a)], {"rgb": [...]} или {"hsv": [h, s, v(, a)]}
+        
+        Returns:
+            (режим, каналы - числа или выражения) или None
+        """
+        if color is None:
+            return None
+        
+        mode, channels = 'rgb', color
+        if isinstance(color, dict):
+            modes = [key for key in ('rgb', 'hsv') if key in color]
+            if len(modes) == 1:
+                mode = modes[0]
+                channels = color[mode]
+        
+        if (not isinstance(channels, (list, tuple)) or len(channels) not in (3, 4)
+                or not all(cls._is_number(value) or isinstance(value, str) for value in channels)):
+            cls._error(field, f"'{field}' must be [r, g, b], {{\"rgb\": [...]}} or {{\"hsv\": [h, s, v]}}, "
+                              f"got {color!r}")
+            return None
+        
+        return mode, list(channels)
+    
+    @staticmethod
+    def _is_number(value: Any) -> bool:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    
+    @staticmethod
+    def _error(field: str, message: str):
+        diagnostics.error("SceneCompiler", field, f"Scene error: {message}")
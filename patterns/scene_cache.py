@@ -0,0 +1,270 @@
+"""
+Кэш скомпилированных сцен на диске
+
+Деревья CompiledPoint (байт-код выражений, вынесенные подвыражения,
+функции по имени) и таблицы параметров, зависящих только от n,
+сохраняются через marshal. Ключ - точки сцены, count, версия
+движка и версия байт-кода Python:
+при следующем запуске неизменённая сцена загружается без компиляции
+и без вычисления таблиц по n.
+
+Каталог создаётся доступным только владельцу, а имена в загруженном
+байт-коде проверяются так же, как при компиляции: чужой файл не
+выполнит ничего, кроме разрешённых выражений. Старые файлы удаляются,
+когда кэш превышает MAX_CACHE_FILES файлов или MAX_CACHE_BYTES.
+"""
+import hashlib
+import importlib.util
+import json
+import marshal
+import os
+import types
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from math_engine.expression_parser import code_names
+from math_engine.point_compiler import FRAME_NAMES, CompiledParam, CompiledPoint
+from .scene import CompiledScene
+
+
+# Версия формата: увеличивается при изменении компилятора точек
+ENGINE_VERSION = 3
+
+# Каталог кэша по умолчанию
+SCENE_CACHE_DIR = ".scene_cache"
+
+# Таблицы по n больше этого объёма не сохраняются (вычисляются в первом кадре)
+MAX_TABLE_BYTES = 64 * 1024 * 1024
+
+# Размер кэша: сверх этого удаляются файлы, которые дольше не использовались
+MAX_CACHE_FILES = 32
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class SceneCache:
+    """Сохранение и загрузка скомпилированных точек сцены"""
+    
+    def __init__(self, directory: str = SCENE_CACHE_DIR):
+        self.directory = directory
+    
+    @staticmethod
+    def key(scene: CompiledScene) -> str:
+        """Ключ сцены: точки, count, версия движка и байт-кода"""
+        source = json.dumps({
+            'points': scene.points,
+            'count': scene.count,
+            'engine': ENGINE_VERSION,
+            'python': importlib.util.MAGIC_NUMBER.hex(),
+        }, sort_keys=True, default=str)
+        return hashlib.sha1(source.encode('utf-8')).hexdigest()
+    
+    def path(self, scene: CompiledScene) -> str:
+        return os.path.join(self.directory, f"{self.key(scene)}.marshal")
+    
+    def load(self, scene: CompiledScene, function_library, expression_parser,
+             n: np.ndarray) -> Optional[List[CompiledPoint]]:
+        """
+        Скомпилированные точки сцены из кэша
+        
+        Args:
+            n: массив индексов итераций паттерна - к нему
+               привязываются загруженные таблицы
+        
+        Returns:
+            Список точек или None, если кэша нет или он не подходит
+        """
+        path = self.path(scene)
+        if not self._is_private():
+            return None
+        
+        try:
+            with open(path, 'rb') as f:
+                data = marshal.load(f)
+        except OSError:
+            return None
+        except (EOFError, ValueError, TypeError) as e:
+            print(f"SceneCache: ignoring damaged {path}: {e}")
+            return None
+        
+        loader = _Loader(function_library, expression_parser, n, scene.count)
+        try:
+            programs = [loader.point(item) for item in data]
+        except Exception as e:
+            print(f"SceneCache: ignoring {path}: {e}")
+            return None
+        
+        # Время использования: при очистке файл остаётся среди новых
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        
+        print(f"SceneCache: loaded {len(programs)} points from {path}")
+        return programs
+    
+    def save(self, scene: CompiledScene, programs: List[Optional[CompiledPoint]], n: np.ndarray):
+        """
+        Сохранение скомпилированных точек и их таблиц по n
+        
+        Сцена с ошибками компиляции не сохраняется: сообщения
+        об ошибках должны появляться при каждом запуске.
+        """
+        if any(program is None for program in programs):
+            return
+        
+        # Таблицы по n считаются сейчас, а не в первом кадре
+        context = scene.frame_context(n, 0.0)
+        params = [param for program in programs for param in _walk_params(program)]
+        indexed = [param for param in params if param.kind == CompiledParam.INDEX]
+        for param in indexed:
+            param.evaluate(context)
+        if any(param.broken for param in params):
+            return
+        
+        # Таблица с ошибкой вычисления не готова: сцена не сохраняется
+        if any(param._cache_key is None or param._cache_key[0] is not n for param in indexed):
+            return
+        
+        table_bytes = sum(param._cache_value.nbytes for param in indexed)
+        saver = _Saver(n, with_tables=table_bytes <= MAX_TABLE_BYTES)
+        
+        path = self.path(scene)
+        temp_path = path + ".tmp"
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                marshal.dump([saver.point(program) for program in programs], f)
+            os.replace(temp_path, path)
+        except (OSError, ValueError) as e:
+            print(f"SceneCache: error writing {path}: {e}")
+            return
+        
+        self.prune()
+    
+    def prune(self, max_files: int = MAX_CACHE_FILES, max_bytes: int = MAX_CACHE_BYTES):
+        """Удаление давно не использованных файлов сверх лимитов"""
+        try:
+            entries = [entry for entry in os.scandir(self.directory)
+                       if entry.is_file() and entry.name.endswith(".marshal")]
+            entries = [(entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in entries]
+        except OSError:
+            return
+        
+        entries.sort(reverse=True)
+        kept_bytes = 0
+        for index, (_, size, path) in enumerate(entries):
+            kept_bytes += size
+            # Самый новый файл (только что записанный) остаётся всегда
+            if index > 0 and (index >= max_files or kept_bytes > max_bytes):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+    
+    def _is_private(self) -> bool:
+        """Каталог кэша принадлежит пользователю и недоступен для записи другим"""
+        if not hasattr(os, 'getuid'):
+            return True
+        try:
+            info = os.stat(self.directory)
+        except OSError:
+            return False
+        if info.st_uid != os.getuid() or info.st_mode & 0o022:
+            print(f"SceneCache: ignoring {self.directory}: directory is writable by other users")
+            return False
+        return True
+
+
+def _walk_params(point: CompiledPoint):
+    """Все параметры дерева точки, включая вынесенные подвыражения"""
+    stack = list(point.params.values())
+    while stack:
+        param = stack.pop()
+        yield param
+        stack.extend(hoisted for _, hoisted in param.hoisted)
+    for child in point.children:
+        yield from _walk_params(child)
+
+
+class _Saver:
+    """Дерево CompiledPoint -> значения, которые понимает marshal"""
+    
+    def __init__(self, n: np.ndarray, with_tables: bool):
+        self.n = n
+        self.with_tables = with_tables
+    
+    def point(self, point: CompiledPoint) -> tuple:
+        return (
+            point.func.function_id,
+            {key: self.param(param) for key, param in point.params.items()},
+            [self.point(child) for child in point.children],
+            point.options,
+        )
+    
+    def param(self, param: CompiledParam) -> tuple:
+        table = None
+        if (self.with_tables and param.kind == CompiledParam.INDEX
+                and param._cache_key is not None and param._cache_key[0] is self.n):
+            value = np.ascontiguousarray(param._cache_value, dtype=np.float64)
+            table = (value.shape, value.tobytes())
+        
+        return (
+            param.source,
+            param.value,
+            param.compiled,
+            [(name, self.param(hoisted)) for name, hoisted in param.hoisted],
+            table,
+        )
+
+
+class _Loader:
+    """Значения из marshal -> дерево CompiledPoint"""
+    
+    def __init__(self, function_library, expression_parser, n: np.ndarray, count: int):
+        self.function_library = function_library
+        self.expression_parser = expression_parser
+        self.n = n
+        self.count = count
+    
+    def point(self, data: tuple) -> CompiledPoint:
+        function_id, params, children, options = data
+        func = self.function_library.get(function_id)
+        return CompiledPoint(
+            func,
+            {key: self.param(param, func.context_names) for key, param in params.items()},
+            [self.point(child) for child in children],
+            options,
+        )
+    
+    def param(self, data: tuple, context_names: Sequence[str] = ()) -> CompiledParam:
+        source, value, compiled, hoisted, table = data
+        hoisted = [(name, self.param(item, context_names)) for name, item in hoisted]
+        if compiled is not None:
+            self._check_names(compiled, context_names, [name for name, _ in hoisted])
+        
+        param = CompiledParam(
+            source, value=value, compiled=compiled,
+            parser=self.expression_parser if compiled is not None else None,
+            hoisted=hoisted,
+        )
+        
+        if table is not None:
+            shape, buffer = table
+            values = np.frombuffer(buffer, dtype=np.float64).reshape(shape)
+            param._cache_key = (self.n, self.count)
+            param._cache_value = values  # Только для чтения, как и вычисленная таблица
+        
+        return param
+    
+    def _check_names(self, compiled: tuple, context_names: Sequence[str], hoisted_names: List[str]):
+        """Байт-код использует только имена, которые разрешает компилятор"""
+        code, free_names = compiled
+        if not isinstance(code, types.CodeType):
+            raise ValueError("cached expression is not code")
+        
+        builtins = self.expression_parser.builtins.keys()
+        names = code_names(code)
+        allowed = builtins | FRAME_NAMES | frozenset(context_names) | frozenset(hoisted_names)
+        if not names <= allowed or frozenset(free_names) != names - builtins:
+            raise ValueError(f"unexpected names in cached expression: {sorted(names - allowed)}")
@@ -0,0 +1,189 @@
+"""
+Профилирование кадров: время стадий, перцентили, CSV
+
+Стадии кадра (обновление и отрисовка каждого аддона, вычисление
+геометрии, запись в буфер) замеряются контекстным менеджером stage().
+Кадр закрывается end_frame(): длительность кадра и стадий попадает
+в скользящее окно и, если задан csv_path, дописывается в CSV.
+"""
+import contextlib
+import csv
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class FrameProfiler:
+    """Замер стадий кадра со скользящим окном статистики"""
+    
+    # Перцентили времени кадра в отчёте
+    PERCENTILES = (50, 95, 99)
+    
+    # Строк CSV в буфере до записи на диск
+    CSV_FLUSH_FRAMES = 120
+    
+    def __init__(self, window_size: int = 300, csv_path: Optional[str] = None):
+        self.window_size = window_size
+        self.frame_index = 0
+        
+        # Скользящее окно: длительность кадра и стадий, мс
+        self.frame_times: deque = deque(maxlen=window_size)
+        self.stage_times: Dict[str, deque] = {}
+        
+        self._current: Dict[str, float] = {}  # Стадии текущего кадра
+        self._last_frame_end: Optional[float] = None
+        
+        self._csv_file = None
+        self._csv_writer = None
+        self._csv_pending = 0
+        if csv_path:
+            self.open_csv(csv_path)
+    
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """Замер стадии; повторные замеры за кадр суммируются"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000.0
+            self._current[name] = self._current.get(name, 0.0) + elapsed
+    
+    def end_frame(self):
+        """
+        Закрытие кадра
+        
+        Время кадра - интервал между вызовами end_frame,
+        то есть полный период кадра, включая ожидание vsync.
+        """
+        now = time.perf_counter()
+        if self._last_frame_end is None:
+            self._last_frame_end = now
+            self._current = {}
+            return
+        
+        frame_ms = (now - self._last_frame_end) * 1000.0
+        self._last_frame_end = now
+        self.frame_times.append(frame_ms)
+        
+        # Стадия без замера в этом кадре получает 0 - окна стадий синхронны
+        for name in self._current.keys() - self.stage_times.keys():
+            self.stage_times[name] = deque(maxlen=self.window_size)
+        for name, samples in self.stage_times.items():
+            samples.append(self._current.get(name, 0.0))
+        
+        if self._csv_writer is not None:
+            self._write_csv(frame_ms)
+        
+        self._current = {}
+        self.frame_index += 1
+    
+    def percentiles(self) -> Dict[int, float]:
+        """Перцентили времени кадра в окне, мс"""
+        if not self.frame_times:
+            return {p: 0.0 for p in self.PERCENTILES}
+        values = np.percentile(np.fromiter(self.frame_times, dtype=np.float64), self.PERCENTILES)
+        return dict(zip(self.PERCENTILES, values.tolist()))
+    
+    def fps(self) -> float:
+        """Средний FPS в окне"""
+        if not self.frame_times:
+            return 0.0
+        mean = sum(self.frame_times) / len(self.frame_times)
+        return 1000.0 / mean if mean > 0 else 0.0
+    
+    def stage_stats(self) -> List[Tuple[str, float, float]]:
+        """Стадии в окне: (имя, среднее мс, p95 мс), по убыванию среднего"""
+        stats = []
+        for name, samples in self.stage_times.items():
+            values = np.fromiter(samples, dtype=np.float64)
+            stats.append((name, float(values.mean()), float(np.percentile(values, 95))))
+        stats.sort(key=lambda item: item[1], reverse=True)
+        return stats
+    
+    def summary(self) -> str:
+        """Текстовая сводка: FPS, перцентили кадра, разбивка по стадиям"""
+        p = self.percentiles()
+        lines = [
+            f"FPS {self.fps():.1f}  frame p50 {p[50]:.2f} ms  p95 {p[95]:.2f} ms  p99 {p[99]:.2f} ms"
+        ]
+        for name, mean, p95 in self.stage_stats():
+            lines.append(f"  {name:<32} {mean:7.3f} ms  p95 {p95:7.3f} ms")
+        return "\n".join(lines)
+    
+    def open_csv(self, path: str):
+        """
+        Дозапись кадров в CSV
+        
+        Формат длинный: frame, timestamp, stage, ms - строка на каждую
+        стадию кадра и строка stage=frame с полной длительностью кадра.
+        """
+        self.close_csv()
+        try:
+            self._csv_file = open(path, 'a', newline='', encoding='utf-8')
+        except OSError as e:
+            print(f"Profiler: cannot open CSV {path}: {e}")
+            return
+        
+        self._csv_writer = csv.writer(self._csv_file)
+        if self._csv_file.tell() == 0:
+            self._csv_writer.writerow(('frame', 'timestamp', 'stage', 'ms'))
+        print(f"Profiler: writing frame samples to {path}")
+    
+    def _write_csv(self, frame_ms: float):
+        timestamp = f"{time.time():.6f}"
+        rows = [(self.frame_index, timestamp, 'frame', f"{frame_ms:.4f}")]
+        rows.extend((self.frame_index, timestamp, name, f"{ms:.4f}")
+                    for name, ms in self._current.items())
+        self._csv_writer.writerows(rows)
+        
+        self._csv_pending += 1
+        if self._csv_pending >= self.CSV_FLUSH_FRAMES:
+            self._csv_file.flush()
+            self._csv_pending = 0
+    
+    def close_csv(self):
+        """Запись буфера и закрытие CSV"""
+        if self._csv_file is not None:
+            self._csv_file.close()
+        self._csv_file = None
+        self._csv_writer = None
+        self._csv_pending = 0
+
+
+class ProfilerOverlay:
+    """Наложение со сводкой профилировщика поверх сцены"""
+    
+    # Период обновления текста: пересборка Label дорогая
+    REFRESH_INTERVAL = 0.25
+    
+    def __init__(self, profiler: FrameProfiler):
+        import pyglet
+        
+        self.profiler = profiler
+        self.visible = False
+        self.batch = pyglet.graphics.Batch()
+        self.label = pyglet.text.Label(
+            "", font_name="monospace", font_size=10,
+            x=8, y=8, width=640, multiline=True,
+            anchor_x='left', anchor_y='bottom',
+            color=(0, 255, 0, 255), batch=self.batch
+        )
+        self._last_refresh = 0.0
+    
+    def toggle(self):
+        self.visible = not self.visible
+        self._last_refresh = 0.0
+    
+    def draw(self):
+        if not self.visible:
+            return
+        
+        now = time.perf_counter()
+        if now - self._last_refresh >= self.REFRESH_INTERVAL:
+            self.label.text = self.profiler.summary()
+            self._last_refresh = now
+        
+        self.batch.draw()
@@ -0,0 +1,24 @@
+"""Канал диагностики при записи из другого потока"""
+import threading
+
+from math_engine.diagnostics import Diagnostics
+
+
+def test_report_while_another_thread_adds_errors(capsys):
+    diagnostics = Diagnostics(report_interval=0.0)
+    diagnostics.MAX_IMMEDIATE = 0
+    done = threading.Event()
+    
+    def writer():
+        for index in range(4000):
+            diagnostics.error("Test", f"source {index % 2000}", f"error {index}")
+        done.set()
+    
+    thread = threading.Thread(target=writer)
+    thread.start()
+    while not done.is_set():
+        diagnostics.report(force=True)
+    thread.join()
+    
+    assert diagnostics.count("Test") == 4000
+    assert len(diagnostics.summary()) == 2000
@@ -0,0 +1,65 @@
+"""Вычисление выражений над массивами n совпадает со скалярным parse"""
+import numpy as np
+import pytest
+
+from math_engine.expression_parser import ExpressionParser
+from patterns.scene import SceneCompiler
+
+
+@pytest.fixture
+def parser():
+    return ExpressionParser()
+
+
+@pytest.mark.parametrize('expression', ['n**-1', 'pow(n, -1)', 'n*n*n*n'])
+def test_integer_indices_match_scalar(parser, expression):
+    scene = SceneCompiler.compile({'count': 100001})
+    n = np.array([1, 2, 99999, 100000])
+    context = scene.frame_context(n, 0.0)
+    
+    values = parser.evaluate_array(parser.compile_expression(expression), context, n.shape)
+    
+    expected = [parser.parse(expression, {'n': int(i)}) for i in n]
+    assert values == pytest.approx(expected, rel=1e-12)
+
+
+@pytest.mark.parametrize('expression', [
+    '10 if n > 2 else n',
+    '1/n if n > 0 else -1',
+    '0 < n < 4',
+    'n > 1 and n < 4 or n == 5',
+    'n if not n > 2 else time * 2',
+    'n > 2 and time',
+    'n or 5',
+    'n and n - 2 or 7',
+])
+def test_conditionals_on_arrays(parser, expression):
+    n = np.arange(6, dtype=np.float64)
+    
+    values = parser.evaluate_array(parser.compile_expression(expression), {'n': n, 'time': 3.0}, n.shape)
+    
+    expected = [parser.parse(expression, {'n': i, 'time': 3.0}) for i in range(6)]
+    assert values.tolist() == expected
+
+
+def test_conditional_point_is_not_broken():
+    from patterns.connect_pattern import ConnectPattern
+    
+    pattern = ConnectPattern()
+    pattern.set_config({'count': 4, 'center': [0, 0],
+                        'points': [{'func': 'fixed', 'x': '1 if n > 1 else time'}, {'func': 'fixed'}]})
+    pattern.set_expression_parser(ExpressionParser())
+    
+    assert pattern.calculate_all_lines(5.0)[:, 0].tolist() == [5.0, 5.0, 1.0, 1.0]
+
+
+def test_context_does_not_stay_in_namespace(parser):
+    namespace = dict(parser._namespace)
+    
+    assert parser.parse('x * 2', {'x': 3}) == 6.0
+    assert parser._namespace == namespace
+
+
+def test_context_cannot_shadow_builtins(parser):
+    assert parser.parse('sin(0)', {'sin': 5}) == 0.0
+    assert parser.parse('sin(pi / 2)') == 1.0
@@ -0,0 +1,66 @@
+"""Рендеринг без окна от загрузки сцены до записи кадров"""
+import os
+
+import numpy as np
+import pytest
+
+import offline_renderer
+from offline_renderer import OfflineRenderer
+
+
+SCENE = {
+    "parametric_lines": {
+        "count": 12,
+        "color": {"hsv": ["n * 30", 100, 100]},
+        "points": [{"func": "circle", "size": 40}, {"func": "fixed"}],
+    },
+    "lines": [{"start": [0, 0], "end": [60, 40], "color": [255, 0, 0]}],
+}
+
+
+def test_render_png_frames(tmp_path):
+    renderer = OfflineRenderer(SCENE, width=80, height=60)
+    
+    throughput = renderer.render(str(tmp_path), fps=10, duration=0.3)
+    
+    assert throughput > 0
+    assert sorted(os.listdir(tmp_path)) == [f"frame_{i:05d}.png" for i in range(3)]
+    assert [evaluator for _, evaluator in renderer.layers] == [None]
+
+
+def test_render_again_draws_the_pattern(tmp_path):
+    renderer = OfflineRenderer(SCENE, width=80, height=60)
+    
+    renderer.render(str(tmp_path / "first"), fps=10, duration=0.1)
+    renderer.render(str(tmp_path / "second"), fps=10, duration=0.1)
+    
+    first = (tmp_path / "first" / "frame_00000.png").read_bytes()
+    assert (tmp_path / "second" / "frame_00000.png").read_bytes() == first
+
+
+def test_render_raw_frames(tmp_path):
+    output = tmp_path / "frames.raw"
+    renderer = OfflineRenderer(SCENE, width=80, height=60)
+    
+    renderer.render(str(output), fps=10, duration=0.2, output_format='raw')
+    
+    frames = np.fromfile(output, dtype=np.uint8).reshape(-1, 60, 80, 4)
+    assert len(frames) == 2
+    assert frames[..., :3].any()
+
+
+def test_from_file_rejects_unreadable_scene(tmp_path):
+    with pytest.raises(ValueError):
+        OfflineRenderer.from_file(str(tmp_path / "missing.json"))
+
+
+def test_workers_fall_back_to_this_process(monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise OSError("no processes")
+    
+    monkeypatch.setattr(offline_renderer, 'ParallelEvaluator', unavailable)
+    scene = {"parametric_lines": dict(SCENE["parametric_lines"], workers=2)}
+    renderer = OfflineRenderer(scene, width=80, height=60)
+    
+    assert renderer.layers[0][1] is None
+    assert renderer.render_frame(0.0)[..., :3].any()
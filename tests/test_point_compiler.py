@@ -0,0 +1,61 @@
+"""Ошибки выражений точек: при загрузке и в отдельном кадре"""
+import pytest
+
+from math_engine.diagnostics import diagnostics
+from math_engine.expression_parser import ExpressionParser
+from math_engine.function_library import FunctionLibrary
+from math_engine.point_compiler import PointCompiler
+from patterns.connect_pattern import ConnectPattern
+
+
+def make_pattern(point):
+    pattern = ConnectPattern()
+    pattern.set_config({'count': 3, 'center': [0, 0], 'points': [point, {'func': 'fixed'}]})
+    pattern.set_expression_parser(ExpressionParser())
+    return pattern
+
+
+def test_runtime_error_zeroes_only_that_frame():
+    pattern = make_pattern({'func': 'fixed', 'x': '10/(time % 2)', 'y': '1/time'})
+    
+    assert pattern.calculate_all_lines(0.0)[0, :2].tolist() == [0.0, 0.0]
+    assert pattern.calculate_all_lines(1.0)[0, :2].tolist() == [10.0, 1.0]
+    assert pattern.calculate_all_lines(5.0)[0, :2].tolist() == pytest.approx([10.0, 0.2])
+
+
+def test_unknown_name_is_broken_at_load():
+    parser = ExpressionParser()
+    compiler = PointCompiler(FunctionLibrary(parser), parser)
+    
+    param = compiler.compile_param('n * bogus')
+    
+    assert param.broken
+    assert param.evaluate({'n': 1.0, 'time': 0.0}) == 0.0
+
+
+def test_untaken_branch_is_not_evaluated():
+    diagnostics.clear()
+    pattern = make_pattern({'func': 'fixed', 'x': '1/time if n > 2 else n', 'y': 'n > 5 and 1/time'})
+    
+    lines = pattern.calculate_all_lines(0.0)
+    
+    assert lines[:, 0].tolist() == [0.0, 1.0, 2.0]
+    assert diagnostics.count() == 0
+
+
+def test_reused_programs_are_not_recompiled(monkeypatch):
+    point = {'func': 'sum', 'functions': [{'func': 'circle', 'size': 'n + time'}], 'x': 'n * 2'}
+    current = make_pattern(point)
+    expected = current.calculate_all_lines(1.0)
+    
+    def fail(*args, **kwargs):
+        raise AssertionError("point was compiled again")
+    
+    monkeypatch.setattr(PointCompiler, 'compile_point', fail)
+    pattern = make_pattern(point)
+    pattern.reuse_programs(current)
+    
+    assert pattern.calculate_all_lines(1.0).tolist() == expected.tolist()
+    assert pattern.expression_parser is not current.expression_parser
+    assert all(param.parser in (None, pattern.expression_parser)
+               for program in pattern.scene.programs for param in program.params.values())
@@ -0,0 +1,27 @@
+"""Сборка CompiledScene из конфигурации паттерна"""
+import pytest
+
+from math_engine.expression_parser import ExpressionParser
+from patterns.connect_pattern import ConnectPattern
+from patterns.scene import SceneCompiler
+
+
+def test_points_keep_function_defaults_at_every_level():
+    config = {'points': [{'func': 'circle'}, {'func': 'sum', 'functions': [{'func': 'circle'}]}]}
+    
+    scene = SceneCompiler.compile(config)
+    
+    assert scene.count == 36
+    assert scene.points == config['points']
+    assert scene.points is not config['points']
+
+
+def test_circle_without_size_is_unit_at_top_level_and_nested():
+    pattern = ConnectPattern()
+    pattern.set_config({'count': 4, 'center': [0, 0], 'points': [
+        {'func': 'circle', 'angle': 0},
+        {'func': 'sum', 'functions': [{'func': 'circle', 'angle': 0}]},
+    ]})
+    pattern.set_expression_parser(ExpressionParser())
+    
+    assert pattern.calculate_all_lines(0.0)[0].tolist() == pytest.approx([1.0, 0.0, 1.0, 0.0])
@@ -0,0 +1,60 @@
+"""Кэш скомпилированных сцен: загрузка, проверка байт-кода, очистка"""
+import marshal
+import os
+
+import numpy as np
+
+from math_engine.expression_parser import ExpressionParser
+from patterns.connect_pattern import ConnectPattern
+from patterns.scene_cache import SceneCache
+
+
+def make_pattern(cache, count=50, size='100 + n'):
+    pattern = ConnectPattern()
+    pattern.set_config({'count': count, 'center': [0, 0],
+                        'points': [{'func': 'circle', 'size': size}, {'func': 'fixed', 'x': 'time'}]})
+    pattern.set_expression_parser(ExpressionParser())
+    pattern.scene_cache = cache
+    return pattern
+
+
+def test_cached_scene_matches_compiled(tmp_path, capsys):
+    cache = SceneCache(str(tmp_path / "cache"))
+    expected = make_pattern(cache).calculate_all_lines(1.5)
+    
+    lines = make_pattern(cache).calculate_all_lines(1.5)
+    
+    assert "SceneCache: loaded 2 points" in capsys.readouterr().out
+    assert np.array_equal(lines, expected)
+    assert os.stat(cache.directory).st_mode & 0o077 == 0
+
+
+def test_unexpected_names_are_rejected(tmp_path):
+    cache = SceneCache(str(tmp_path / "cache"))
+    pattern = make_pattern(cache)
+    pattern.calculate_all_lines(0.0)
+    
+    path = cache.path(pattern.scene)
+    with open(path, 'rb') as f:
+        data = marshal.load(f)
+    source, value, _, hoisted, table = data[1][1]['x']
+    data[1][1]['x'] = (source, value, (compile("().__class__", "<string>", "eval"), frozenset()), hoisted, table)
+    with open(path, 'wb') as f:
+        marshal.dump(data, f)
+    
+    assert cache.load(pattern.scene, *_engine(pattern)) is None
+
+
+def test_prune_keeps_newest_files(tmp_path):
+    cache = SceneCache(str(tmp_path / "cache"))
+    for count in range(1, 6):
+        make_pattern(cache, count=count).calculate_all_lines(0.0)
+    
+    cache.prune(max_files=2)
+    
+    assert len(os.listdir(cache.directory)) == 2
+    assert os.path.exists(cache.path(make_pattern(cache, count=5).scene))
+
+
+def _engine(pattern):
+    return pattern.function_library, pattern.expression_parser, pattern._get_iteration_indices()